@@ -0,0 +1,302 @@
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote_plus
+from xml.sax.saxutils import escape
+import hashlib
+import json
+import os
+import random
+import re
+
+# (status, content type, body)
+Fixture = Tuple[int, str, bytes]
+
+JSON = 'application/json'
+XML = 'application/xml'
+ATOM = 'application/atom+xml'
+HTML = 'text/html; charset=utf-8'
+
+VENUES = ['Computer Methods in Materials Science', 'ICCS', 'Procedia Computer Science', 'Archives of Metallurgy']
+TOPICS = ['neural networks', 'finite element modelling', 'machine learning', 'metal forming', 'parallel algorithms']
+
+# Title slots: about 8M combinations, and titles sharing most slots are still rarely 90% similar
+TITLE_ADJECTIVES = [
+    'Adaptive', 'Scalable', 'Robust', 'Efficient', 'Hybrid', 'Probabilistic', 'Distributed', 'Incremental',
+    'Multiscale', 'Data-driven', 'Lightweight', 'Physics-informed', 'Stochastic', 'Coupled', 'Inverse', 'Real-time'
+]
+TITLE_METHODS = [
+    'neural network', 'finite element', 'cellular automata', 'graph-based', 'evolutionary', 'Bayesian',
+    'sparse regression', 'GPU-accelerated', 'mesh-free', 'surrogate', 'agent-based', 'spectral', 'multigrid',
+    'reduced-order', 'kernel', 'transformer'
+]
+TITLE_TASKS = [
+    'modelling', 'solvers', 'heuristics', 'simulation', 'optimisation', 'inference', 'scheduling', 'reconstruction',
+    'segmentation', 'forecasting', 'calibration', 'identification', 'monitoring', 'control', 'design', 'validation'
+]
+TITLE_PROCESSES = [
+    'hot strip rolling', 'wire drawing', 'sheet metal forming', 'extrusion', 'die forging', 'continuous casting',
+    'laser welding', 'heat treatment', 'powder bed fusion', 'grain growth', 'crack propagation', 'recrystallization',
+    'phase transformation', 'fatigue loading', 'creep', 'corrosion'
+]
+TITLE_MATERIALS = [
+    'dual-phase steels', 'aluminium alloys', 'titanium alloys', 'magnesium sheets', 'nickel superalloys', 'copper wires',
+    'TRIP steels', 'metal foams', 'composite laminates', 'high-entropy alloys', 'stainless steels', 'tool steels',
+    'polycrystals', 'thin films', 'lattice structures', 'welded joints'
+]
+TITLE_QUALIFIERS = [
+    '', ' under uncertainty', ' with limited data', ': a comparative study', ' at industrial scale',
+    ' on HPC clusters', ' revisited', ': a case study'
+]
+
+
+class FixtureStore:
+    """
+    Recorded upstream responses, one JSON object per line with method, host, path, query,
+    status, content_type and body. A request is matched on method, host, path and query,
+    then on method, host and path alone.
+    """
+
+    def __init__(self, records: Optional[List[dict]] = None):
+        self.exact: Dict[Tuple[str, str, str, str], Fixture] = {}
+        self.by_path: Dict[Tuple[str, str, str], Fixture] = {}
+        for record in records or []:
+            self.add(record)
+
+    def add(self, record: dict):
+        fixture = (record['status'], record.get('content_type', JSON), record['body'].encode())
+        self.exact[(record['method'], record['host'], record['path'], record.get('query', ''))] = fixture
+        self.by_path.setdefault((record['method'], record['host'], record['path']), fixture)
+
+    def lookup(self, method: str, host: str, path: str, query: str) -> Optional[Fixture]:
+        return self.exact.get((method, host, path, query)) or self.by_path.get((method, host, path))
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> 'FixtureStore':
+        records = []
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        return cls(records)
+
+
+def _seed(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=4).digest(), 'little')
+
+
+def make_publications(name: str, count: int) -> List[dict]:
+    """Deterministic publications for a name, newest first, with a co-author and a topic each."""
+    seed = _seed(name)
+    return [
+        {
+            'key': f"{seed:08x}-{i}",
+            'title': f"On {TOPICS[(seed + i) % len(TOPICS)]} in practice, part {i + 1}",
+            'year': 2024 - i // 3,
+            'venue': VENUES[(seed + i) % len(VENUES)],
+            'authors': [name, f"Co Author{(seed + i) % 97}"],
+            'doi': f"10.5555/bench.{seed:08x}.{i}"
+        }
+        for i in range(count)
+    ]
+
+
+def make_titles(count: int, seed: int = 0) -> List[str]:
+    """
+    Distinct, plausible paper titles. Accidental 90%-similar pairs stay rare (about 3% of
+    titles at 10k), so near-duplicates in a benchmark are the ones it adds on purpose.
+    """
+    rng = random.Random(seed)
+    titles: Dict[str, None] = {}
+    while len(titles) < count:
+        title = (
+            f"{rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_METHODS)} {rng.choice(TITLE_TASKS)} "
+            f"for {rng.choice(TITLE_PROCESSES)} of {rng.choice(TITLE_MATERIALS)}{rng.choice(TITLE_QUALIFIERS)}"
+        )
+        titles[title] = None
+    return list(titles)
+
+
+def _json(data) -> Fixture:
+    return 200, JSON, json.dumps(data).encode()
+
+
+class SyntheticUpstreams:
+    """
+    Plausible responses for every upstream the scrapers and Strapi client call, generated from
+    the searched name so the scorer accepts them. `items` is the number of publications per profile.
+    Identifiers handed out in search results are remembered, so follow-up requests resolve them.
+    """
+
+    def __init__(self, items: int = 20):
+        self.items = items
+        self._names: Dict[str, str] = {}
+        self._proposals = 0
+
+    def identifiers(self) -> List[str]:
+        """Identifiers handed out so far (ORCID iDs, dblp pids, authorIds, DOIs), oldest first."""
+        return list(self._names)
+
+    def _id(self, prefix: str, name: str) -> str:
+        seed = _seed(name)
+        identifier = f"{prefix}{seed % 10000:04d}-{seed // 10000 % 10000:04d}"
+        self._names[identifier] = name
+        return identifier
+
+    def respond(self, method: str, host: str, path: str, query: str, body: bytes) -> Optional[Fixture]:
+        params = {key: values[0] for key, values in parse_qs(query).items()}
+
+        if host == 'pub.orcid.org':
+            return self.orcid(path, params)
+        if host == 'dblp.org':
+            return self.dblp(path, params)
+        if host == 'api.semanticscholar.org':
+            return self.semantic_scholar(path, params)
+        if host == 'export.arxiv.org':
+            return self.arxiv(params)
+        if host == 'scholar.google.com':
+            return self.google_scholar(params)
+        if path.startswith('/api/'):
+            return self.strapi(method, path)
+        return None
+
+    def orcid(self, path: str, params: Dict[str, str]) -> Optional[Fixture]:
+        if path.rstrip('/') == '/v3.0/search':
+            match = re.match(r'given-names:(.+?) AND family-name:(.+)', unquote_plus(params.get('q', '')))
+            if not match:
+                return _json({'result': [], 'num-found': 0})
+            orcid_id = self._id('0000-0002-', f"{match.group(1)} {match.group(2)}")
+            return _json({'result': [{'orcid-identifier': {'path': orcid_id}}], 'num-found': 1})
+
+        parts = path.strip('/').split('/')
+        name = self._names.get(parts[1]) if len(parts) > 1 else None
+        if name is None:
+            return 404, JSON, b'{}'
+
+        given, _, family = name.partition(' ')
+        modified = 1700000000000 + _seed(name) % 10000000
+
+        if len(parts) == 2:
+            return _json({
+                'person': {'name': {'given-names': {'value': given}, 'family-name': {'value': family}}},
+                'activities-summary': {
+                    'employments': {'affiliation-group': [{'summaries': [{'employment-summary': {
+                        'organization': {'name': 'AGH University of Krakow'}
+                    }}]}]},
+                    'educations': {'affiliation-group': []},
+                    'works': {'last-modified-date': {'value': modified}}
+                }
+            })
+
+        publications = make_publications(name, self.items)
+        for pub in publications:
+            self._names[pub['doi']] = name
+
+        return _json({'group': [
+            {
+                'last-modified-date': {'value': modified},
+                'work-summary': [{
+                    'title': {'title': {'value': pub['title']}},
+                    'publication-date': {'year': {'value': str(pub['year'])}},
+                    'external-ids': {'external-id': [{'external-id-type': 'doi', 'external-id-value': pub['doi']}]}
+                }]
+            }
+            for pub in publications
+        ]})
+
+    def dblp(self, path: str, params: Dict[str, str]) -> Optional[Fixture]:
+        if path == '/search/author/api':
+            name = params.get('q', '')
+            pid = self._id('pid/', name)
+            return _json({'result': {'hits': {'hit': [
+                {'info': {'author': name, 'url': f"https://dblp.org/{pid}"}}
+            ]}}})
+
+        if path.startswith('/orcid/'):
+            name = self._names.get(path.removeprefix('/orcid/'))
+            if name is None:
+                return 404, HTML, b''
+            # Redirects carry their Location in the body; the stub server turns it into the header
+            return 303, HTML, f"https://dblp.org/{self._id('pid/', name)}.html".encode()
+
+        name = self._names.get(path.strip('/').removesuffix('.xml'))
+        if name is None:
+            return 404, XML, b'<error/>'
+
+        records = ''.join(
+            f"<r><article key=\"journals/bench/{pub['key']}\">"
+            + ''.join(f"<author>{escape(author)}</author>" for author in pub['authors'])
+            + f"<title>{escape(pub['title'])}</title><year>{pub['year']}</year>"
+            + f"<journal>{escape(pub['venue'])}</journal><ee>https://doi.org/{pub['doi']}</ee></article></r>"
+            for pub in make_publications(name, self.items)
+        )
+        return 200, XML, f"<?xml version=\"1.0\"?><dblpperson name=\"{escape(name)}\">{records}</dblpperson>".encode()
+
+    def semantic_scholar(self, path: str, params: Dict[str, str]) -> Optional[Fixture]:
+        if path == '/graph/v1/author/search':
+            name = params.get('query', '')
+            return _json({'data': [{'authorId': self._id('', name), 'name': name}]})
+
+        if path.startswith('/graph/v1/paper/DOI:'):
+            name = self._names.get(path.removeprefix('/graph/v1/paper/DOI:'))
+            if name is None:
+                return 404, JSON, b'{}'
+            return _json({'paperId': 'bench', 'authors': [
+                {'authorId': '1', 'name': 'Co Author'},
+                {'authorId': self._id('', name), 'name': name}
+            ]})
+
+        parts = path.strip('/').split('/')
+        name = self._names.get(parts[3]) if len(parts) > 3 else None
+        if name is None:
+            return 404, JSON, b'{}'
+
+        limit = int(params.get('limit', self.items))
+        return _json({'data': [
+            {
+                'paperId': pub['key'],
+                'title': pub['title'],
+                'abstract': f"We study {TOPICS[i % len(TOPICS)]} with applications to computer science.",
+                'year': pub['year'],
+                'url': f"https://www.semanticscholar.org/paper/{pub['key']}",
+                'venue': pub['venue'],
+                'citationCount': i,
+                'authors': [{'name': author} for author in pub['authors']]
+            }
+            for i, pub in enumerate(make_publications(name, self.items)[:limit])
+        ]})
+
+    def arxiv(self, params: Dict[str, str]) -> Fixture:
+        match = re.match(r'au:(.+?)(?: AND |$)', params.get('search_query', ''))
+        name = match.group(1) if match else 'Unknown Author'
+        limit = int(params.get('max_results', self.items))
+
+        entries = ''.join(
+            f"<entry><title>{escape(pub['title'])}</title>"
+            f"<summary>A preprint on {escape(pub['venue'])} and machine learning.</summary>"
+            + ''.join(f"<author><name>{escape(author)}</name></author>" for author in pub['authors'])
+            + f"<link title=\"pdf\" href=\"http://arxiv.org/pdf/{pub['key']}\"/>"
+            + f"<published>{pub['year']}-01-15T00:00:00Z</published>"
+            + "<category term=\"cs.LG\"/></entry>"
+            for pub in make_publications(name, self.items)[:limit]
+        )
+        return 200, ATOM, f"<feed xmlns=\"http://www.w3.org/2005/Atom\">{entries}</feed>".encode()
+
+    def google_scholar(self, params: Dict[str, str]) -> Fixture:
+        name = params.get('q', '')
+        initials = ' '.join(part[0] for part in name.split()[:-1])
+        last = name.split()[-1] if name.split() else ''
+
+        results = ''.join(
+            f"<div class=\"gs_r\"><div class=\"gs_ri\"><h3 class=\"gs_rt\">"
+            f"<a href=\"https://scholar.example.org/{pub['key']}\">{escape(pub['title'])}</a></h3>"
+            f"<div class=\"gs_a\">{escape(initials)} {escape(last)}, C Author - AGH University, {pub['year']} - bench.org</div>"
+            f"<div class=\"gs_rs\">Results on {escape(pub['venue'])} for computer science.</div></div></div>"
+            for pub in make_publications(name, self.items)[:10]
+        )
+        return 200, HTML, f"<html><body>{results}</body></html>".encode()
+
+    def strapi(self, method: str, path: str) -> Fixture:
+        if method == 'GET' and path == '/api/data-proposals':
+            return _json({'data': [], 'meta': {'pagination': {'page': 1, 'pageSize': 100, 'pageCount': 0, 'total': 0}}})
+        if method == 'POST' and path == '/api/data-proposals':
+            self._proposals += 1
+            return 201, JSON, json.dumps({'data': {'id': self._proposals}}).encode()
+        return _json({'data': {}})
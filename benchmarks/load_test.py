@@ -0,0 +1,282 @@
+"""
+End-to-end load test against local stub upstreams (see stub_upstreams.py).
+
+For each concurrency level, a fresh batch of teachers is pushed through either
+aggregate_teacher_data directly (--mode aggregate) or the app's /api/scrape/teacher/sync
+and /api/scrape/teacher/stream endpoints in-process (--mode sync / stream). Reports
+teachers/sec, p50/p95/p99 latency and peak RSS (this process plus its parser workers).
+
+    python -m benchmarks.load_test --concurrency 1,4,16 --teachers 32
+    python -m benchmarks.load_test --mode sync --latency 0.3 --jitter 0.2 --error-rate 0.05 --json out.json
+
+Rate limits and per-source concurrency caps are lifted so upstream latency dominates;
+pass --production-limits to keep the configured ones. Responses can be recorded from the
+real upstreams once and replayed afterwards:
+
+    python -m benchmarks.load_test --record fixtures.jsonl --teacher "Piotr Hajder"
+    python -m benchmarks.load_test --fixtures fixtures.jsonl
+"""
+from typing import Awaitable, Callable, List, Optional, Tuple
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_upstreams import add_stub_arguments, start_stub_process, stub_config  # noqa: E402
+
+FIRST_NAMES = ['Anna', 'Piotr', 'Jan', 'Maria', 'Tomasz', 'Katarzyna', 'Marek', 'Agnieszka']
+LAST_NAMES = ['Nowak', 'Kowalski', 'Wisniewski', 'Lewandowska', 'Zielinski', 'Kaminska', 'Hajder', 'Mazur']
+
+# (teacher) -> (succeeded, items)
+TeacherCall = Callable[[dict], Awaitable[Tuple[bool, int]]]
+
+
+def configure_environment(args: argparse.Namespace):
+    """Must run before the app's modules are imported, since config.py reads the environment once."""
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='isim-bench-')
+    os.environ['HTTP_CACHE_ENABLED'] = 'true' if args.cache else 'false'
+    os.environ['IDENTITY_CACHE_ENABLED'] = 'true' if args.identities else 'false'
+    os.environ['TRACING_EXPORTER'] = 'jsonl' if args.tracing else 'none'
+    os.environ['PARSE_WORKERS'] = str(args.parse_workers)
+    os.environ.setdefault('STRAPI_API_TOKEN', 'bench')
+
+    if not args.production_limits and not args.record:
+        for source in ('ARXIV', 'SEMANTIC_SCHOLAR', 'GOOGLE_SCHOLAR', 'ORCID', 'DBLP'):
+            os.environ[f'RATE_LIMIT_{source}_RPS'] = '10000'
+        os.environ['RATE_LIMIT_DEFAULT_RPS'] = '10000'
+        for source in ('ARXIV', 'SEMANTIC_SCHOLAR', 'GOOGLE_SCHOLAR'):
+            os.environ[f'SOURCE_CONCURRENCY_{source}'] = '1000'
+        os.environ['SOURCE_CONCURRENCY_DEFAULT'] = '1000'
+
+
+def make_teachers(count: int, batch: str) -> List[dict]:
+    return [
+        {
+            'first_name': FIRST_NAMES[i % len(FIRST_NAMES)],
+            'last_name': f"{LAST_NAMES[i // len(FIRST_NAMES) % len(LAST_NAMES)]}{i // 64 or ''}",
+            'member_document_id': f"bench-{batch}-{i}",
+            'current_institution': 'AGH University of Krakow',
+            'field_of_study': 'Computer Science'
+        }
+        for i in range(count)
+    ]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class RssSampler:
+    """Samples the summed RSS of this process and its children (parser pool), excluding the stub server."""
+
+    def __init__(self, exclude: Optional[set] = None, interval: float = 0.05):
+        self.exclude = exclude or set()
+        self.interval = interval
+        self.peak = 0
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def _rss(self, pid: int) -> int:
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                return int(f.read().split()[1]) * self.page_size
+        except (OSError, IndexError, ValueError):
+            return 0
+
+    def current(self) -> int:
+        pids = [os.getpid()] + [p.pid for p in multiprocessing.active_children() if p.pid not in self.exclude]
+        total = sum(self._rss(pid) for pid in pids)
+        # No /proc (macOS): fall back to this process's lifetime peak
+        return total or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    async def run(self):
+        while True:
+            self.peak = max(self.peak, self.current())
+            await asyncio.sleep(self.interval)
+
+
+async def run_level(call: TeacherCall, teachers: List[dict], concurrency: int, exclude: set) -> dict:
+    pending = list(reversed(teachers))
+    latencies: List[float] = []
+    failures = 0
+    items = 0
+
+    async def worker():
+        nonlocal failures, items
+        while pending:
+            teacher = pending.pop()
+            started = time.perf_counter()
+            try:
+                ok, count = await call(teacher)
+            except Exception as e:
+                print(f"Request failed: {e}", file=sys.stderr)
+                ok, count = False, 0
+            latencies.append(time.perf_counter() - started)
+            failures += not ok
+            items += count
+
+    sampler = RssSampler(exclude)
+    sampling = asyncio.create_task(sampler.run())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    sampling.cancel()
+    sampler.peak = max(sampler.peak, sampler.current())
+
+    return {
+        'concurrency': concurrency,
+        'teachers': len(teachers),
+        'elapsed': round(elapsed, 3),
+        'teachers_per_sec': round(len(teachers) / elapsed, 3),
+        'p50': round(percentile(latencies, 50), 3),
+        'p95': round(percentile(latencies, 95), 3),
+        'p99': round(percentile(latencies, 99), 3),
+        'failures': failures,
+        'items': items,
+        'peak_rss_mb': round(sampler.peak / 2 ** 20, 1)
+    }
+
+
+async def run_levels(call: TeacherCall, args: argparse.Namespace, exclude: set) -> List[dict]:
+    # One untimed teacher first, so parser-pool start-up and imports do not land in the first level
+    await call(make_teachers(1, 'warmup')[0])
+    return [
+        await run_level(call, make_teachers(args.teachers, f"c{level}"), level, exclude)
+        for level in args.concurrency
+    ]
+
+
+def print_results(mode: str, results: List[dict]):
+    print(f"\nmode={mode}")
+    print(f"{'conc':>5} {'teachers':>8} {'t/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'fail':>5} {'items':>6} {'rss MB':>8}")
+    for r in results:
+        print(
+            f"{r['concurrency']:>5} {r['teachers']:>8} {r['teachers_per_sec']:>8.2f} {r['p50']:>7.3f} "
+            f"{r['p95']:>7.3f} {r['p99']:>7.3f} {r['failures']:>5} {r['items']:>6} {r['peak_rss_mb']:>8.1f}"
+        )
+
+
+async def benchmark_aggregate(args: argparse.Namespace, port: int, exclude: set) -> List[dict]:
+    from benchmarks.stub_upstreams import StubTransport
+    from config import PARSE_WORKERS
+    from http_client import ClientRegistry, set_registry
+    from models import TeacherRequest
+    from parsing import start_executor, shutdown_executor
+    from rate_limit import RateLimiter
+    from services import aggregate_teacher_data
+
+    start_executor(PARSE_WORKERS)
+    clients = ClientRegistry(rate_limiter=RateLimiter(), transport=StubTransport(port))
+    set_registry(clients)
+
+    async def call(teacher: dict) -> Tuple[bool, int]:
+        proposal = await aggregate_teacher_data(TeacherRequest(**teacher), clients=clients)
+        ok = any(status.status == 'complete' for status in proposal.sources.values())
+        return ok, len(proposal.scrapedData)
+
+    try:
+        return await run_levels(call, args, exclude)
+    finally:
+        set_registry(None)
+        await clients.aclose()
+        shutdown_executor()
+
+
+async def benchmark_endpoint(args: argparse.Namespace, port: int, exclude: set) -> List[dict]:
+    import httpx
+    from benchmarks.stub_upstreams import StubTransport
+    import main
+
+    async with main.lifespan(main.app):
+        main.app.state.clients.transport = StubTransport(port)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+
+            async def call_sync(teacher: dict) -> Tuple[bool, int]:
+                response = await client.post('/api/scrape/teacher/sync', json=teacher)
+                return response.status_code == 200, response.json().get('scraped_items', 0) if response.status_code == 200 else 0
+
+            async def call_stream(teacher: dict) -> Tuple[bool, int]:
+                response = await client.post('/api/scrape/teacher/stream', json=teacher)
+                lines = [json.loads(line) for line in response.text.splitlines() if line]
+                summary = lines[-1] if lines and lines[-1].get('event') == 'summary' else None
+                return response.status_code == 200 and summary is not None, summary['total'] if summary else 0
+
+            call = call_sync if args.mode == 'sync' else call_stream
+            return await run_levels(call, args, exclude)
+
+
+async def record_fixtures(args: argparse.Namespace):
+    """Runs each --teacher once against the real upstreams, appending every response to --record."""
+    from benchmarks.stub_upstreams import RecordingTransport
+    from http_client import ClientRegistry, set_registry
+    from models import TeacherRequest
+    from rate_limit import RateLimiter
+    from services import aggregate_teacher_data
+
+    clients = ClientRegistry(rate_limiter=RateLimiter(), transport=RecordingTransport(args.record))
+    set_registry(clients)
+    try:
+        for name in args.teacher:
+            first_name, _, last_name = name.rpartition(' ')
+            proposal = await aggregate_teacher_data(
+                TeacherRequest(first_name=first_name, last_name=last_name, current_institution='AGH'),
+                clients=clients
+            )
+            print(f"Recorded {name}: {len(proposal.scrapedData)} items")
+    finally:
+        set_registry(None)
+        await clients.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['aggregate', 'sync', 'stream'], default='aggregate')
+    parser.add_argument('--concurrency', type=lambda v: [int(c) for c in v.split(',')], default=[1, 4, 16])
+    parser.add_argument('--teachers', type=int, default=32, help='Teachers per concurrency level')
+    parser.add_argument('--parse-workers', type=int, default=2)
+    parser.add_argument('--production-limits', action='store_true', help='Keep configured rate limits and source caps')
+    parser.add_argument('--cache', action='store_true', help='Keep the HTTP response cache enabled')
+    parser.add_argument('--identities', action='store_true', help='Keep the identity cache enabled (its lookups and writes in sync and stream modes)')
+    parser.add_argument('--tracing', action='store_true', help='Export spans to a JSONL file in the temp data dir')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--verbose', action='store_true', help="Keep the scrapers' progress output")
+    parser.add_argument('--record', help='Record real upstream responses to this JSONL file instead of benchmarking')
+    parser.add_argument('--teacher', action='append', default=[], help='"First Last" to record (repeatable)')
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    configure_environment(args)
+
+    if args.record:
+        asyncio.run(record_fixtures(args))
+        return
+
+    stub, port = start_stub_process(stub_config(args))
+    try:
+        benchmark = benchmark_aggregate if args.mode == 'aggregate' else benchmark_endpoint
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            results = asyncio.run(benchmark(args, port, {stub.pid}))
+    finally:
+        stub.terminate()
+
+    print_results(args.mode, results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'mode': args.mode, 'stub': vars(stub_config(args)), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
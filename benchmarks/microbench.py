@@ -0,0 +1,317 @@
+"""
+Microbenchmarks for the CPU-bound hot paths, with stored baselines.
+
+Each case runs on synthetic inputs of 10, 100, 1k and 10k items (and, with --fixtures, on
+response bodies recorded by load_test.py --record). The best of --repeat runs is compared with
+the baseline file; the run exits with status 1 when any case is slower than the baseline by
+more than --threshold (25% by default), and with status 2 when any case has no baseline at all
+(no baseline file, or new cases) unless --allow-missing-baseline is given.
+
+    python -m benchmarks.microbench --save-baseline      # record baselines on this machine
+    python -m benchmarks.microbench                      # compare against them
+    python -m benchmarks.microbench --filter dedup --sizes 10,100,1000
+
+Baselines are only comparable on the machine (and Python version) that produced them.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import SyntheticUpstreams, TOPICS, VENUES, make_titles  # noqa: E402
+from models import ScrapedData  # noqa: E402
+from scrapers.arxiv import parse_arxiv_entries  # noqa: E402
+from scrapers.dblp import parse_dblp_publications  # noqa: E402
+from scrapers.google_scholar import parse_google_scholar_results  # noqa: E402
+from services.aggregation import deduplicate_papers  # noqa: E402
+from services.skos import parse_department_members, parse_member_profile  # noqa: E402
+from utils import ConfidenceScorer, calculate_confidence_score, get_scorer  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SIZES = [10, 100, 1000, 10000]
+
+TARGET = ('Piotr Hajder', 'AGH University of Krakow', 'Computer Science')
+
+
+@dataclass
+class Case:
+    """`setup(n)` builds the input once and returns the function that is timed."""
+    name: str
+    setup: Callable[[int], Callable[[], object]]
+
+
+# Share of scraped items that are another source's copy of an earlier paper
+DUPLICATE_RATE = 0.2
+SOURCES = ['ORCID', 'dblp', 'Semantic Scholar']
+
+
+def make_papers(n: int, duplicate_rate: float = DUPLICATE_RATE) -> List[dict]:
+    """
+    Scraped items as the sources produce them: distinct titles, of which `duplicate_rate`
+    reappear from another source. A copy of a paper with a DOI shares the DOI; a copy of one
+    without a DOI has a near-duplicate title (trailing period), so both dedup paths are exercised.
+    """
+    rng = random.Random(n)
+    titles = iter(make_titles(n, seed=n))
+    papers: List[dict] = []
+    for i in range(n):
+        if papers and rng.random() < duplicate_rate:
+            original = rng.choice(papers)
+            paper = {
+                **original,
+                'source': rng.choice([source for source in SOURCES if source != original['source']]),
+                'url': f"{original['url']}/copy{i}",
+                'confidenceScore': round(rng.uniform(0.3, 1.0), 2)
+            }
+            if not original['raw_data'].get('doi'):
+                paper['title'] = original['title'] + '.'
+            papers.append(paper)
+            continue
+
+        year = 2024 - rng.randrange(15)
+        doi = f"10.5555/bench.{n}.{i}" if rng.random() < 0.5 else None
+        papers.append({
+            'source': rng.choice(SOURCES),
+            'url': f"https://example.org/{n}/{i}",
+            'title': next(titles),
+            'description': f"Published in {rng.choice(VENUES)} ({year})",
+            'authors': f"{TARGET[0]}, Co Author{rng.randrange(97)}",
+            'confidenceScore': round(rng.uniform(0.3, 1.0), 2),
+            'raw_data': {'doi': doi, 'year': year} if doi else {'year': year}
+        })
+    return papers
+
+
+def make_score_items(n: int) -> List[tuple]:
+    """(authors, institution, text) tuples, all distinct so the scorer's memo does not help."""
+    first, last = TARGET[0].split()
+    return [
+        (
+            [f"{first} {last}", f"{first[0]}. {last}", f"{last}{i % 7} {first}", f"Anna Nowak{i % 13}"][i % 4] + f" {i}",
+            ['AGH University', 'Politechnika Krakowska', None][i % 3],
+            f"{TOPICS[i % len(TOPICS)]} in {VENUES[i % len(VENUES)]} {i}"
+        )
+        for i in range(n)
+    ]
+
+
+def case_calculate_confidence_score(n: int):
+    items = make_score_items(n)
+
+    def run():
+        get_scorer.cache_clear()
+        return [calculate_confidence_score(name, TARGET[0], institution, TARGET[1], text, TARGET[2]) for name, institution, text in items]
+    return run
+
+
+def case_score_batch(n: int):
+    items = make_score_items(n)
+    return lambda: ConfidenceScorer(*TARGET).score_batch(items)
+
+
+def case_deduplicate_papers(n: int):
+    papers = make_papers(n)
+    return lambda: deduplicate_papers(papers)
+
+
+def case_parse_dblp(n: int):
+    upstreams = SyntheticUpstreams(items=n)
+    upstreams.dblp('/search/author/api', {'q': TARGET[0]})
+    pid = upstreams.identifiers()[0]
+    content = upstreams.dblp(f"/{pid}.xml", {})[2]
+    return lambda: parse_dblp_publications(content, 5)
+
+
+def case_parse_arxiv(n: int):
+    content = SyntheticUpstreams(items=n).arxiv({'search_query': f"au:{TARGET[0]}", 'max_results': str(n)})[2]
+    return lambda: parse_arxiv_entries(content)
+
+
+def case_parse_google_scholar(n: int):
+    upstreams = SyntheticUpstreams(items=n)
+    html = upstreams.google_scholar({'q': TARGET[0]})[2].decode()
+    # The synthetic results page is capped at 10 entries; repeat it to reach n
+    body = html.removeprefix('<html><body>').removesuffix('</body></html>')
+    html = '<html><body>' + body * max(1, n // 10) + '</body></html>'
+    return lambda: parse_google_scholar_results(html, 'https://scholar.google.com/scholar', n)
+
+
+def case_parse_skos_department(n: int):
+    links = ''.join(
+        f"<li><a href=\"/osoba/member-{i}\">Nowak{i} Jan, dr inz.</a></li><li><a href=\"/jednostka/{i}\">Unit {i}</a></li>"
+        for i in range(n)
+    )
+    html = f"<html><body><ul>{links}</ul></body></html>"
+    return lambda: parse_department_members(html)
+
+
+def case_parse_skos_profiles(n: int):
+    next_data = json.dumps({'props': {'pageProps': {'data': {
+        'workplaces': [{
+            'office': {'building': 'B-4, al. Mickiewicza 30', 'room': 'pok. 101'},
+            'phoneDetails': [{'countryCode': '48', 'phoneNumber': '12 617 00 00'}]
+        }],
+        # Stored reversed, as on the real pages
+        'emails': ['<a href="mailto:nowak#agh.edu.pl">nowak#agh.edu.pl</a>'[::-1]]
+    }}}})
+    html = f"<html><head><script id=\"__NEXT_DATA__\" type=\"application/json\">{next_data}</script></head><body></body></html>"
+    return lambda: [parse_member_profile(html, f"https://skos.agh.edu.pl/osoba/{i}") for i in range(n)]
+
+
+def case_scraped_data(n: int):
+    papers = make_papers(n)
+    return lambda: [ScrapedData(**paper) for paper in papers]
+
+
+def case_model_dump(n: int):
+    models = [ScrapedData(**paper) for paper in make_papers(n)]
+    return lambda: [model.model_dump() for model in models]
+
+
+CASES = [
+    Case('calculate_confidence_score', case_calculate_confidence_score),
+    Case('score_batch', case_score_batch),
+    Case('deduplicate_papers', case_deduplicate_papers),
+    Case('parse_dblp_publications', case_parse_dblp),
+    Case('parse_arxiv_entries', case_parse_arxiv),
+    Case('parse_google_scholar_results', case_parse_google_scholar),
+    Case('parse_department_members', case_parse_skos_department),
+    Case('parse_member_profile', case_parse_skos_profiles),
+    Case('ScrapedData', case_scraped_data),
+    Case('ScrapedData.model_dump', case_model_dump),
+]
+
+# Recorded response bodies per parser, keyed by the upstream they came from
+FIXTURE_PARSERS = {
+    'parse_dblp_publications': (lambda r: r['host'] == 'dblp.org' and r['path'].endswith('.xml'), lambda body: parse_dblp_publications(body.encode(), 5)),
+    'parse_arxiv_entries': (lambda r: r['host'] == 'export.arxiv.org', lambda body: parse_arxiv_entries(body.encode())),
+    'parse_google_scholar_results': (lambda r: r['host'] == 'scholar.google.com', lambda body: parse_google_scholar_results(body, '', 10)),
+    'parse_member_profile': (lambda r: r['host'] == 'skos.agh.edu.pl' and '/osoba/' in r['path'], lambda body: parse_member_profile(body, '')),
+}
+
+
+def fixture_cases(path: str) -> Dict[str, Callable[[], object]]:
+    """One timed function per parser, running it over every matching recorded body."""
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    cases = {}
+    for name, (matches, parse) in FIXTURE_PARSERS.items():
+        bodies = [r['body'] for r in records if r.get('status') == 200 and matches(r)]
+        if bodies:
+            cases[f"{name}[fixture x{len(bodies)}]"] = lambda bodies=bodies, parse=parse: [parse(body) for body in bodies]
+    return cases
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Best per-call time over `repeat` rounds, each long enough to span `min_time`."""
+    started = time.perf_counter()
+    func()
+    single = time.perf_counter() - started
+    number = max(1, int(min_time / single)) if single > 0 else 1000
+
+    best = single
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(path: str, results: Dict[str, float]):
+    with open(path, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': f"{platform.system()} {platform.machine()} {platform.node()}",
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results
+        }, f, indent=2, sort_keys=True)
+
+
+def run(args: argparse.Namespace) -> int:
+    timed: Dict[str, Callable[[], Callable[[], object]]] = {}
+    for case in CASES:
+        for n in args.sizes:
+            timed[f"{case.name}[{n}]"] = lambda case=case, n=n: case.setup(n)
+    if args.fixtures:
+        for key, func in fixture_cases(args.fixtures).items():
+            timed[key] = lambda func=func: func
+
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    results: Dict[str, float] = {}
+    regressions: List[str] = []
+    missing: List[str] = []
+
+    print(f"{'case':<44} {'best':>11} {'baseline':>11} {'ratio':>7}")
+    for key, setup in timed.items():
+        if args.filter and args.filter not in key:
+            continue
+
+        seconds = measure(setup(), args.repeat, args.min_time)
+        results[key] = seconds
+
+        reference: Optional[float] = baseline.get(key)
+        ratio = seconds / reference if reference else None
+        flag = ''
+        if reference is None and not args.save_baseline:
+            missing.append(key)
+            flag = '  NO BASELINE'
+        if ratio is not None and ratio > 1 + args.threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(
+            f"{key:<44} {seconds * 1e3:>9.3f}ms "
+            f"{(f'{reference * 1e3:.3f}ms' if reference else '-'):>11} "
+            f"{(f'{ratio:.2f}x' if ratio else '-'):>7}{flag}"
+        )
+
+    if args.save_baseline:
+        merged = {**load_baseline(args.baseline), **results}
+        save_baseline(args.baseline, merged)
+        print(f"\nSaved {len(results)} baselines to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    if missing:
+        print(
+            f"\nWARNING: {len(missing)} case(s) have no baseline in {args.baseline} and were not compared: "
+            f"{', '.join(missing)}\nRecord them on this machine with --save-baseline.",
+            file=sys.stderr
+        )
+        return 0 if args.allow_missing_baseline else 2
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=lambda v: [int(n) for n in v.split(',')], default=SIZES)
+    parser.add_argument('--filter', help='Only run cases whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per round')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown before failing (0.25 = 25%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Store these timings as the new baselines')
+    parser.add_argument('--allow-missing-baseline', action='store_true', help='Exit 0 even when cases have no baseline to compare with')
+    parser.add_argument('--fixtures', help='Also time the parsers on responses recorded by load_test.py --record')
+    sys.exit(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
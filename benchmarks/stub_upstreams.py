@@ -0,0 +1,228 @@
+"""
+Local stand-ins for ORCID, dblp, arXiv, Semantic Scholar, Google Scholar and Strapi.
+
+The server replays recorded fixtures (see `record` in load_test.py) and falls back to synthetic
+responses, adding configurable latency, jitter and injected errors. Requests reach it through
+StubTransport, which keeps the original host in an X-Upstream-Host header.
+
+    python -m benchmarks.stub_upstreams --port 8900 --latency 0.2 --jitter 0.1 --error-rate 0.02
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import httpx
+from benchmarks.fixtures import FixtureStore, SyntheticUpstreams
+
+UPSTREAM_HEADER = 'x-upstream-host'
+
+REASONS = {200: 'OK', 201: 'Created', 303: 'See Other', 404: 'Not Found', 429: 'Too Many Requests', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+@dataclass
+class StubConfig:
+    """Latencies are in seconds; `host_latency` overrides `latency` for single upstream hosts."""
+    latency: float = 0.1
+    jitter: float = 0.05
+    error_rate: float = 0.0
+    error_status: int = 500
+    items: int = 20
+    fixtures: Optional[str] = None
+    host_latency: Dict[str, float] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+
+class StubServer:
+    """Minimal HTTP/1.1 server with keep-alive; one asyncio task per connection."""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.fixtures = FixtureStore.load(config.fixtures)
+        self.synthetic = SyntheticUpstreams(config.items)
+        self.random = random.Random(config.seed)
+        self.requests = 0
+        self.errors = 0
+
+    async def _respond(self, method: str, host: str, target: str, body: bytes):
+        self.requests += 1
+        latency = self.config.host_latency.get(host, self.config.latency)
+        delay = max(0.0, latency + self.random.uniform(-self.config.jitter, self.config.jitter))
+        await asyncio.sleep(delay)
+
+        if self.random.random() < self.config.error_rate:
+            self.errors += 1
+            return self.config.error_status, 'application/json', b'{"error": "injected"}'
+
+        path, _, query = target.partition('?')
+        fixture = self.fixtures.lookup(method, host, path, query)
+        if fixture is None:
+            fixture = self.synthetic.respond(method, host, path, query, body)
+        return fixture or (404, 'application/json', b'{"error": "no fixture"}')
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                host = headers.get(UPSTREAM_HEADER) or headers.get('host', '')
+                status, content_type, payload = await self._respond(method, host, target, body)
+
+                location = ''
+                if 300 <= status < 400:
+                    location, payload = f"Location: {payload.decode()}\r\n", b''
+
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"{location}"
+                    f"Retry-After: 0\r\n\r\n".encode('latin-1') + payload
+                )
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, port: int = 0, ready=None):
+        server = await asyncio.start_server(self.handle, '127.0.0.1', port, backlog=1024)
+        port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready.put(port)
+        else:
+            print(f"Stub upstreams listening on 127.0.0.1:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+class StubTransport(httpx.AsyncBaseTransport):
+    """
+    Rewrites every request to the stub server, keeping one connection pool per original host
+    so ClientRegistry's per-host pooling is preserved.
+    """
+
+    def __init__(self, port: int, limits: Optional[httpx.Limits] = None):
+        self.port = port
+        self.limits = limits or httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        self._pools: Dict[str, httpx.AsyncHTTPTransport] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.netloc.decode()
+        pool = self._pools.get(host)
+        if pool is None:
+            pool = self._pools[host] = httpx.AsyncHTTPTransport(limits=self.limits)
+
+        # A new request rather than a rewritten one: ClientRegistry re-sends the original on retries
+        stub_request = httpx.Request(
+            request.method,
+            request.url.copy_with(scheme='http', host='127.0.0.1', port=self.port),
+            headers=[*request.headers.raw, (UPSTREAM_HEADER.encode(), request.url.host.encode())],
+            stream=request.stream,
+            extensions=request.extensions
+        )
+        return await pool.handle_async_request(stub_request)
+
+    async def aclose(self):
+        # Shared by all of ClientRegistry's clients, so it is closed once per client
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            await pool.aclose()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forwards to the real upstreams and appends every response to a fixtures file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._transport = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        content = await response.aread()
+
+        record = {
+            'method': request.method,
+            'host': request.url.host,
+            'path': request.url.path,
+            'query': request.url.query.decode(),
+            'status': response.status_code,
+            'content_type': response.headers.get('content-type', 'application/json'),
+            'body': content.decode('utf-8', errors='replace')
+        }
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+        headers = [(k, v) for k, v in response.headers.items() if k not in ('content-encoding', 'content-length', 'transfer-encoding')]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _run(config: StubConfig, port: int, ready):
+    asyncio.run(StubServer(config).serve(port, ready))
+
+
+def start_stub_process(config: StubConfig, port: int = 0) -> tuple[multiprocessing.Process, int]:
+    """Runs the stub server in its own process so it does not compete for the driver's event loop."""
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    process = context.Process(target=_run, args=(config, port, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+def parse_host_latency(values) -> Dict[str, float]:
+    latencies = {}
+    for value in values or []:
+        host, _, seconds = value.partition('=')
+        latencies[host.strip()] = float(seconds)
+    return latencies
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--latency', type=float, default=0.1, help='Base upstream latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Uniform +/- jitter in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--items', type=int, default=20, help='Publications per synthetic profile')
+    parser.add_argument('--fixtures', help='JSONL file of recorded responses to replay')
+    parser.add_argument('--host-latency', action='append', metavar='HOST=SECONDS', help='Per-host latency override')
+    parser.add_argument('--seed', type=int)
+
+
+def stub_config(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        items=args.items,
+        fixtures=args.fixtures,
+        host_latency=parse_host_latency(args.host_latency),
+        seed=args.seed
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8900)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    asyncio.run(StubServer(stub_config(args)).serve(args.port))
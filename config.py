@@ -1,7 +1,123 @@
 import os
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
 load_dotenv()
 
 STRAPI_URL = os.getenv('STRAPI_URL', 'http://localhost:1337')
 STRAPI_API_TOKEN = os.getenv('STRAPI_API_TOKEN', '')
+
+# Existing proposal URLs are read page by page and cached per member
+STRAPI_PAGE_SIZE = int(os.getenv('STRAPI_PAGE_SIZE', '100'))
+STRAPI_PAGE_CONCURRENCY = int(os.getenv('STRAPI_PAGE_CONCURRENCY', '4'))
+STRAPI_URL_CACHE_TTL = float(os.getenv('STRAPI_URL_CACHE_TTL', '900'))
+STRAPI_URL_CACHE_MAX_MEMBERS = int(os.getenv('STRAPI_URL_CACHE_MAX_MEMBERS', '1024'))
+
+# Retries of transient Strapi failures (full-jitter backoff) and concurrent proposal index reconciliation
+STRAPI_MAX_RETRIES = int(os.getenv('STRAPI_MAX_RETRIES', '3'))
+STRAPI_RETRY_BACKOFF = float(os.getenv('STRAPI_RETRY_BACKOFF', '0.5'))
+STRAPI_BULK_CONCURRENCY = int(os.getenv('STRAPI_BULK_CONCURRENCY', '4'))
+
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '30.0'))
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '20'))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '10'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30.0'))
+HTTP_HTTP2 = os.getenv('HTTP_HTTP2', 'false').lower() in ('1', 'true', 'yes')
+
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', os.path.join(DATA_DIR, 'http_cache.sqlite3'))
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+# Freshness per upstream host in seconds; hosts not listed here are never cached.
+HTTP_CACHE_TTLS = {
+    'pub.orcid.org': float(os.getenv('HTTP_CACHE_TTL_ORCID', str(24 * 3600))),
+    'dblp.org': float(os.getenv('HTTP_CACHE_TTL_DBLP', str(24 * 3600))),
+    'api.semanticscholar.org': float(os.getenv('HTTP_CACHE_TTL_SEMANTIC_SCHOLAR', str(24 * 3600))),
+    'export.arxiv.org': float(os.getenv('HTTP_CACHE_TTL_ARXIV', str(6 * 3600))),
+    'skos.agh.edu.pl': float(os.getenv('HTTP_CACHE_TTL_SKOS', str(7 * 24 * 3600))),
+}
+
+SKOS_DIRECTORY_TTL = float(os.getenv('SKOS_DIRECTORY_TTL', str(6 * 3600)))
+
+# Local index of (member, url) pairs already proposed to Strapi, reconciled with Strapi after MAX_AGE seconds
+PROPOSAL_INDEX_ENABLED = os.getenv('PROPOSAL_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PROPOSAL_INDEX_PATH = os.getenv('PROPOSAL_INDEX_PATH', os.path.join(DATA_DIR, 'proposals.sqlite3'))
+PROPOSAL_INDEX_MAX_AGE = float(os.getenv('PROPOSAL_INDEX_MAX_AGE', str(24 * 3600)))
+PROPOSAL_INDEX_BLOOM_CAPACITY = int(os.getenv('PROPOSAL_INDEX_BLOOM_CAPACITY', '200000'))
+PROPOSAL_INDEX_BLOOM_ERROR_RATE = float(os.getenv('PROPOSAL_INDEX_BLOOM_ERROR_RATE', '0.01'))
+PROPOSAL_INDEX_RECONCILE_INTERVAL = float(os.getenv('PROPOSAL_INDEX_RECONCILE_INTERVAL', '3600'))
+PROPOSAL_INDEX_RECONCILE_BATCH = int(os.getenv('PROPOSAL_INDEX_RECONCILE_BATCH', '50'))
+
+# Per-member, per-source watermarks so repeat scrapes only fetch newer material
+WATERMARKS_ENABLED = os.getenv('WATERMARKS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+WATERMARKS_PATH = os.getenv('WATERMARKS_PATH', os.path.join(DATA_DIR, 'watermarks.sqlite3'))
+
+# Tracing spans: TRACING_EXPORTER is jsonl (TRACING_JSONL_PATH), otlp (OTLP/HTTP JSON to TRACING_OTLP_ENDPOINT) or none.
+# The JSONL file is rotated to TRACING_JSONL_PATH.1 once it reaches TRACING_JSONL_MAX_BYTES;
+# requests to TRACING_EXCLUDE_PATHS (comma-separated) are not traced
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'none').lower()
+TRACING_JSONL_PATH = os.getenv('TRACING_JSONL_PATH', os.path.join(DATA_DIR, 'traces.jsonl'))
+TRACING_JSONL_MAX_BYTES = int(os.getenv('TRACING_JSONL_MAX_BYTES', str(50 * 1024 * 1024)))
+TRACING_EXCLUDE_PATHS = {path.strip() for path in os.getenv('TRACING_EXCLUDE_PATHS', '/metrics').split(',') if path.strip()}
+TRACING_OTLP_ENDPOINT = os.getenv('TRACING_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+TRACING_SERVICE_NAME = os.getenv('TRACING_SERVICE_NAME', 'isim-scraper')
+TRACING_FLUSH_INTERVAL = float(os.getenv('TRACING_FLUSH_INTERVAL', '5'))
+TRACING_MAX_QUEUE = int(os.getenv('TRACING_MAX_QUEUE', '10000'))
+
+# Durable scraping job queue; JOB_WORKERS caps how many teachers are scraped at once.
+# A job interrupted JOB_MAX_ATTEMPTS times (e.g. by crashing the worker) is failed instead of requeued;
+# finished jobs are deleted JOB_RETENTION seconds after they finished (0 keeps them)
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(DATA_DIR, 'jobs.sqlite3'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '5'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', str(7 * 24 * 3600)))
+JOB_PRUNE_INTERVAL = float(os.getenv('JOB_PRUNE_INTERVAL', '3600'))
+
+# Overall budget in seconds for one teacher's aggregation; sources still running are cancelled (0 disables it)
+AGGREGATION_DEADLINE = float(os.getenv('AGGREGATION_DEADLINE', '45'))
+
+# Seconds a dependent source waits for its identity resolvers (ORCID) before falling back to name search
+IDENTITY_WAIT = float(os.getenv('IDENTITY_WAIT', '15'))
+
+# Per-member author identities (ORCID iD, dblp, Semantic Scholar, SKOS profile) resolved with at least
+# IDENTITY_MIN_CONFIDENCE; later scrapes query those IDs directly instead of searching by name
+IDENTITY_CACHE_ENABLED = os.getenv('IDENTITY_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+IDENTITY_CACHE_PATH = os.getenv('IDENTITY_CACHE_PATH', os.path.join(DATA_DIR, 'identities.sqlite3'))
+IDENTITY_MIN_CONFIDENCE = float(os.getenv('IDENTITY_MIN_CONFIDENCE', '0.8'))
+
+# Comma-separated source names skipped by aggregation (University and ResearchGate return nothing yet)
+SOURCES_DISABLED = {
+    name.strip()
+    for name in os.getenv('SOURCES_DISABLED', 'University,ResearchGate').split(',')
+    if name.strip()
+}
+
+# In-flight calls allowed per source across all teachers
+SOURCE_CONCURRENCY_DEFAULT = int(os.getenv('SOURCE_CONCURRENCY_DEFAULT', '4'))
+SOURCE_CONCURRENCY = {
+    'Google Scholar': int(os.getenv('SOURCE_CONCURRENCY_GOOGLE_SCHOLAR', '1')),
+    'arXiv': int(os.getenv('SOURCE_CONCURRENCY_ARXIV', '1')),
+    'Semantic Scholar': int(os.getenv('SOURCE_CONCURRENCY_SEMANTIC_SCHOLAR', '2')),
+}
+
+# Token bucket per upstream host as (requests per second, burst); None exempts a host.
+# Strapi is our own backend, so it is exempt unless RATE_LIMIT_STRAPI_RPS is set
+RATE_LIMIT_STRAPI_RPS = float(os.getenv('RATE_LIMIT_STRAPI_RPS', '0'))
+RATE_LIMITS = {
+    'export.arxiv.org': (float(os.getenv('RATE_LIMIT_ARXIV_RPS', str(1 / 3))), 1.0),
+    'api.semanticscholar.org': (float(os.getenv('RATE_LIMIT_SEMANTIC_SCHOLAR_RPS', '1.0')), 1.0),
+    'scholar.google.com': (float(os.getenv('RATE_LIMIT_GOOGLE_SCHOLAR_RPS', '0.2')), 1.0),
+    'pub.orcid.org': (float(os.getenv('RATE_LIMIT_ORCID_RPS', '8.0')), 8.0),
+    'dblp.org': (float(os.getenv('RATE_LIMIT_DBLP_RPS', '2.0')), 2.0),
+    urlsplit(STRAPI_URL).hostname: (RATE_LIMIT_STRAPI_RPS, RATE_LIMIT_STRAPI_RPS) if RATE_LIMIT_STRAPI_RPS > 0 else None,
+}
+RATE_LIMIT_DEFAULT = (float(os.getenv('RATE_LIMIT_DEFAULT_RPS', '10.0')), 10.0)
+RATE_LIMIT_MIN_RPS = float(os.getenv('RATE_LIMIT_MIN_RPS', '0.05'))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', '3'))
+
+ORCID_CANDIDATE_CONCURRENCY = int(os.getenv('ORCID_CANDIDATE_CONCURRENCY', '5'))
+
+# Processes used to parse HTML/XML off the event loop; 0 parses inline
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', '2'))
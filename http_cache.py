@@ -0,0 +1,192 @@
+from typing import Awaitable, Callable, Dict, Optional
+from email.utils import formatdate
+import json
+import time
+import httpx
+from sqlite_store import SQLiteStore, open_store
+from config import (
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_PATH,
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_TTLS
+)
+
+STORED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+
+class ResponseCache(SQLiteStore):
+    """
+    SQLite-backed cache for GET responses from slow-changing sources.
+    Entries are fresh for the TTL of their host; stale entries with an ETag or
+    Last-Modified are revalidated with a conditional request instead of re-downloaded.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status_code INTEGER NOT NULL,
+            headers TEXT NOT NULL,
+            content BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+    )
+
+    def __init__(self, path: str, ttls: Dict[str, float], max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        super().__init__(path)
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+    def ttl_for(self, host: str) -> Optional[float]:
+        return self.ttls.get(host)
+
+    @staticmethod
+    def make_key(request: httpx.Request) -> str:
+        return f"{request.method} {request.url} accept={request.headers.get('accept', '')}"
+
+    def _load(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status_code, headers, content, stored_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        return {
+            'url': row[0],
+            'status_code': row[1],
+            'headers': json.loads(row[2]),
+            'content': row[3],
+            'stored_at': row[4]
+        }
+
+    def _store(self, key: str, response: httpx.Response):
+        headers = {
+            name: response.headers[name]
+            for name in STORED_HEADERS
+            if name in response.headers
+        }
+        content = response.content
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, str(response.request.url), response.status_code, json.dumps(headers),
+                 content, len(content), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+        self.stats['stores'] += 1
+
+    def _touch(self, key: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.stats['evictions'] += 1
+
+    @staticmethod
+    def _to_response(entry: dict, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            entry['status_code'],
+            headers=entry['headers'],
+            content=entry['content'],
+            request=request
+        )
+
+    async def fetch(
+        self,
+        send: Callable[[httpx.Request], Awaitable[httpx.Response]],
+        request: httpx.Request,
+        ttl: float
+    ) -> httpx.Response:
+        """
+        Serves the request from the cache when fresh, revalidates it when stale,
+        and otherwise sends it and stores a successful response.
+        """
+        key = self.make_key(request)
+        entry = await self._run(self._load, key)
+
+        if entry and time.time() - entry['stored_at'] < ttl:
+            self.stats['hits'] += 1
+            return self._to_response(entry, request)
+
+        if entry:
+            etag = entry['headers'].get('etag')
+            last_modified = entry['headers'].get('last-modified')
+            if etag:
+                request.headers['If-None-Match'] = etag
+            if last_modified:
+                request.headers['If-Modified-Since'] = last_modified
+            elif not etag:
+                request.headers['If-Modified-Since'] = formatdate(entry['stored_at'], usegmt=True)
+
+        response = await send(request)
+
+        if entry and response.status_code == 304:
+            self.stats['revalidated'] += 1
+            await self._run(self._touch, key)
+            return self._to_response(entry, request)
+
+        self.stats['misses'] += 1
+        if response.status_code == 200:
+            await self._run(self._store, key, response)
+
+        return response
+
+    def summary(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+        lookups = self.stats['hits'] + self.stats['revalidated'] + self.stats['misses']
+        served_locally = self.stats['hits'] + self.stats['revalidated']
+        return {
+            **self.stats,
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'hit_ratio': round(served_locally / lookups, 3) if lookups else 0.0
+        }
+
+
+def create_cache() -> Optional[ResponseCache]:
+    return open_store(
+        lambda: ResponseCache(HTTP_CACHE_PATH, HTTP_CACHE_TTLS, HTTP_CACHE_MAX_BYTES),
+        HTTP_CACHE_ENABLED,
+        HTTP_CACHE_PATH,
+        "HTTP cache"
+    )
@@ -0,0 +1,182 @@
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import logging
+import time
+import httpx
+from http_cache import ResponseCache, create_cache
+from rate_limit import RateLimiter, parse_retry_after
+from metrics import HTTP_REQUEST_SECONDS, HTTP_RESPONSE_BYTES, HTTP_RESPONSES, current_source
+from tracing import CLIENT, span
+from config import (
+    RATE_LIMIT_MAX_RETRIES,
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_HTTP2
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses retried through the rate limiter, and the methods safe to resend on them
+RETRY_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ClientRegistry:
+    """
+    Shared httpx clients, one per upstream host.
+    Each host gets its own connection pool so a slow source cannot starve the others,
+    and connections are kept alive between teachers instead of re-doing TCP+TLS per call.
+    A `transport` replaces the network for every client (benchmarks route upstreams to local stubs).
+    """
+
+    def __init__(
+        self,
+        timeout: float = HTTP_TIMEOUT,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP_HTTP2,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+
+        self.timeout = timeout
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        key = self.host_key(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport
+            )
+            self._clients[key] = client
+        return client
+
+    async def send(self, request: httpx.Request) -> httpx.Response:
+        """
+        Sends through the host's token bucket. 429/503 responses slow the bucket down; for GET
+        and HEAD they are retried after Retry-After (or an exponential pause) instead of being
+        returned. Other methods get the response back, since a 503 may follow an applied write.
+        """
+        client = self.client_for(str(request.url))
+        host = request.url.host
+        source = current_source.get()
+
+        with span(f"HTTP {request.method} {host}", CLIENT, **{
+            'http.method': request.method,
+            'server.address': host,
+            'url.path': request.url.path,
+            'source': source
+        }) as http_span:
+            response = await self._send(client, request, host, source)
+            http_span.set_attribute('http.status_code', response.status_code)
+            http_span.set_attribute('http.response.body.size', len(response.content))
+            return response
+
+    async def _send(self, client: httpx.AsyncClient, request: httpx.Request, host: str, source: str) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(host)
+            started = time.perf_counter()
+            response = await client.send(request)
+            HTTP_REQUEST_SECONDS.labels(source, host, request.method).observe(time.perf_counter() - started)
+            HTTP_RESPONSES.labels(source, host, str(response.status_code)).inc()
+            HTTP_RESPONSE_BYTES.labels(source, host).inc(len(response.content))
+
+            if response.status_code not in RETRY_STATUSES:
+                self.rate_limiter.recover(host)
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('retry-after'))
+            if retry_after is None:
+                retry_after = min(60.0, 2.0 ** attempt)
+            self.rate_limiter.backoff(host, retry_after)
+
+            if request.method not in IDEMPOTENT_METHODS:
+                return response
+            if attempt == self.max_retries:
+                break
+            await response.aclose()
+
+        logger.warning(f"Giving up on {request.url} after {self.max_retries} retries: {response.status_code}")
+        return response
+
+    async def request(self, method: str, url: str, use_cache: bool = True, **kwargs) -> httpx.Response:
+        request = self.client_for(url).build_request(method, url, **kwargs)
+
+        if self.cache and use_cache and method == "GET":
+            ttl = self.cache.ttl_for(request.url.host)
+            if ttl:
+                return await self.cache.fetch(self.send, request, ttl)
+
+        return await self.send(request)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+        if self.cache:
+            self.cache.close()
+
+
+_registry: Optional[ClientRegistry] = None
+
+
+def get_registry() -> ClientRegistry:
+    """
+    Returns the process-wide registry. The FastAPI lifespan installs one on startup;
+    scripts running outside the app get a lazily created default.
+    """
+    global _registry
+    if _registry is None:
+        _registry = ClientRegistry(cache=create_cache())
+    return _registry
+
+
+def set_registry(registry: Optional[ClientRegistry]):
+    global _registry
+    _registry = registry
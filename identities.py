@@ -0,0 +1,107 @@
+from typing import Any, Dict, Optional
+import json
+import time
+from config import IDENTITY_CACHE_ENABLED, IDENTITY_CACHE_PATH
+from sqlite_store import SQLiteStore, open_store
+
+# ORCID iD, dblp person URL, Semantic Scholar authorId and SKOS profile URL
+IDENTITY_KEYS = ('orcid', 'dblp', 'semantic_scholar', 'skos')
+
+
+class IdentityStore(SQLiteStore):
+    """
+    Per-member author identities resolved with enough confidence, so later scrapes can query
+    each source by exact ID instead of searching by name and expanding candidates.
+    Pinned entries are manual overrides; scrapes never replace them.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS identities (
+            member TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            pinned INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (member, key)
+        )
+        """,
+    )
+
+    def _get_all(self, member: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, confidence, pinned, updated_at FROM identities WHERE member = ?",
+                (member,)
+            ).fetchall()
+        return {
+            key: {
+                'value': json.loads(value),
+                'confidence': confidence,
+                'pinned': bool(pinned),
+                'updated_at': updated_at
+            }
+            for key, value, confidence, pinned, updated_at in rows
+        }
+
+    def _update(self, member: str, identities: Dict[str, Dict[str, Any]], pinned: bool):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO identities VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (member, key) DO UPDATE SET
+                    value = excluded.value,
+                    confidence = excluded.confidence,
+                    pinned = excluded.pinned,
+                    updated_at = excluded.updated_at
+                WHERE excluded.pinned = 1 OR identities.pinned = 0
+                """,
+                [
+                    (member, key, json.dumps(entry['value']), entry.get('confidence', 1.0), int(pinned), now)
+                    for key, entry in identities.items()
+                ]
+            )
+            self._conn.commit()
+
+    def _clear(self, member: str, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM identities WHERE member = ?", (member,))
+            else:
+                self._conn.execute("DELETE FROM identities WHERE member = ? AND key = ?", (member, key))
+            self._conn.commit()
+
+    async def get_all(self, member: str) -> Dict[str, Dict[str, Any]]:
+        return await self._run(self._get_all, member)
+
+    async def known(self, member: str) -> Optional[Dict[str, Any]]:
+        """
+        The member's identifiers as one flat dict, the form scrapers take as `identity`,
+        with the lowest stored confidence under 'confidence'. None when nothing is known.
+        """
+        entries = await self.get_all(member)
+        if not entries:
+            return None
+        identity: Dict[str, Any] = {key: entry['value'] for key, entry in entries.items()}
+        identity['confidence'] = min(entry['confidence'] for entry in entries.values())
+        return identity
+
+    async def update(self, member: str, identities: Dict[str, Dict[str, Any]]):
+        """Stores resolved {key: {'value', 'confidence'}} entries, leaving pinned ones alone."""
+        if identities:
+            await self._run(self._update, member, identities, False)
+
+    async def pin(self, member: str, values: Dict[str, Any]):
+        """Manual overrides: stored with full confidence and never replaced by a scrape."""
+        if values:
+            entries = {key: {'value': value, 'confidence': 1.0} for key, value in values.items()}
+            await self._run(self._update, member, entries, True)
+
+    async def clear(self, member: str, key: Optional[str] = None):
+        await self._run(self._clear, member, key)
+
+
+def create_identity_store() -> Optional[IdentityStore]:
+    return open_store(lambda: IdentityStore(IDENTITY_CACHE_PATH), IDENTITY_CACHE_ENABLED, IDENTITY_CACHE_PATH, "identity store")
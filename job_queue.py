@@ -0,0 +1,200 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from sqlite_store import SQLiteStore
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+JobHandler = Callable[[dict, Dict[str, float]], Awaitable[dict]]
+
+
+class JobQueue(SQLiteStore):
+    """
+    Durable FIFO of scraping jobs in SQLite.
+    Jobs that were running when the process stopped are put back in the queue on startup,
+    unless they have already been started `max_attempts` times: those are failed, so a job
+    that takes the worker down with it is not retried forever. Done and failed jobs are
+    deleted `retention` seconds after they finished.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            stages TEXT NOT NULL DEFAULT '{}',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+    )
+
+    def __init__(self, path: str, max_attempts: int = 3, retention: Optional[float] = None, prune_interval: float = 3600):
+        super().__init__(path)
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.prune_interval = prune_interval
+
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND attempts >= ?",
+            (FAILED, f"Interrupted {max_attempts} times, not retried", time.time(), RUNNING, max_attempts)
+        )
+        self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+        self._conn.commit()
+
+        self._available = asyncio.Event()
+
+    def _enqueue(self, kind: str, payloads: List[dict]) -> List[str]:
+        job_ids = []
+        now = time.time()
+        with self._lock:
+            for payload in payloads:
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, kind, json.dumps(payload), QUEUED, now)
+                )
+                job_ids.append(job_id)
+            self._conn.commit()
+        return job_ids
+
+    async def enqueue(self, kind: str, payload: dict) -> str:
+        job_ids = await self.enqueue_many(kind, [payload])
+        return job_ids[0]
+
+    async def enqueue_many(self, kind: str, payloads: List[dict]) -> List[str]:
+        job_ids = await self._run(self._enqueue, kind, payloads)
+        self._available.set()
+        return job_ids
+
+    def _claim(self) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, time.time(), row['id'])
+            )
+            self._conn.commit()
+        return {'id': row['id'], 'kind': row['kind'], 'payload': json.loads(row['payload'])}
+
+    def _finish(self, job_id: str, status: str, result: Optional[dict], error: Optional[str], stages: Dict[str, float]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, stages = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error,
+                 json.dumps(stages), time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def _get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['stages'] = json.loads(job['stages'])
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self._run(self._get, job_id)
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED), 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    async def counts(self) -> Dict[str, int]:
+        return await self._run(self._counts)
+
+    def _prune(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - self.retention)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    async def prune(self) -> int:
+        """Deletes done and failed jobs older than the retention period; returns how many."""
+        if self.retention is None:
+            return 0
+        return await self._run(self._prune)
+
+    async def prune_periodically(self):
+        while True:
+            try:
+                pruned = await self.prune()
+                if pruned:
+                    logger.info(f"Pruned {pruned} finished jobs")
+            except sqlite3.Error as e:
+                logger.error(f"Could not prune finished jobs: {e}")
+            await asyncio.sleep(self.prune_interval)
+
+    async def _next(self) -> dict:
+        while True:
+            job = await self._run(self._claim)
+            if job:
+                return job
+            self._available.clear()
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                pass
+
+    async def work(self, handlers: Dict[str, JobHandler]):
+        """Worker loop: claims queued jobs one at a time and records their outcome."""
+        while True:
+            job = await self._next()
+            stages: Dict[str, float] = {}
+            handler = handlers.get(job['kind'])
+
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for job kind '{job['kind']}'")
+                with span(f"job {job['kind']}", job_id=job['id']):
+                    result = await handler(job['payload'], stages)
+                if result.get('status') == FAILED:
+                    await self._run(self._finish, job['id'], FAILED, result, result.get('error'), stages)
+                else:
+                    await self._run(self._finish, job['id'], DONE, result, None, stages)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {e}")
+                await self._run(self._finish, job['id'], FAILED, None, str(e), stages)
+
+    def start_workers(self, handlers: Dict[str, JobHandler], concurrency: int) -> List[asyncio.Task]:
+        """The worker tasks, plus the pruning task when a retention period is set."""
+        workers = [asyncio.create_task(self.work(handlers)) for _ in range(concurrency)]
+        if self.retention is not None:
+            workers.append(asyncio.create_task(self.prune_periodically()))
+        return workers
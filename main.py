@@ -1,19 +1,164 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
-import httpx
-from config import STRAPI_URL, STRAPI_API_TOKEN
-from models import TeacherRequest
-from services import aggregate_teacher_data, send_to_strapi, get_existing_urls
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from config import (
+    STRAPI_URL,
+    STRAPI_API_TOKEN,
+    JOB_QUEUE_PATH,
+    JOB_WORKERS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETENTION,
+    JOB_PRUNE_INTERVAL,
+    PARSE_WORKERS,
+    PROPOSAL_INDEX_RECONCILE_INTERVAL,
+    PROPOSAL_INDEX_RECONCILE_BATCH
+)
+from http_cache import create_cache
+from http_client import ClientRegistry, set_registry
+from job_queue import JobQueue
+from metrics import JOB_QUEUE_DEPTH
+from proposal_index import create_proposal_index
+from watermarks import create_watermark_store
+from identities import IDENTITY_KEYS, create_identity_store
+from tracing import TracingMiddleware, create_exporter, current_trace_id, set_exporter
+from rate_limit import RateLimiter
+from parsing import start_executor, shutdown_executor
+from models import DataProposal, TeacherRequest
+from scrapers import describe_sources
+from services import aggregate_teacher_data, stream_teacher_data, send_to_strapi, known_urls
+from services import StrapiClient, set_strapi
 
-app = FastAPI(title="Teacher Data Aggregation Service")
 
+async def reconcile_proposal_index(strapi: StrapiClient):
+    """Periodically re-reads members whose local proposal index entries have gone stale."""
+    while True:
+        await asyncio.sleep(PROPOSAL_INDEX_RECONCILE_INTERVAL)
+        try:
+            results = await strapi.reconcile_stale(PROPOSAL_INDEX_RECONCILE_BATCH)
+            if results:
+                print(f"Reconciled proposal index for {sum(results.values())}/{len(results)} members")
+        except Exception as e:
+            print(f"Error reconciling proposal index: {e}")
 
-async def process_teacher_scraping(teacher: TeacherRequest):
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    exporter = create_exporter()
+    set_exporter(exporter)
+    
+    start_executor(PARSE_WORKERS)
+    
+    clients = ClientRegistry(cache=create_cache(), rate_limiter=RateLimiter())
+    set_registry(clients)
+    app.state.clients = clients
+    
+    index = create_proposal_index()
+    strapi = StrapiClient(clients, index=index)
+    set_strapi(strapi)
+    app.state.strapi = strapi
+    
+    watermarks = create_watermark_store()
+    app.state.watermarks = watermarks
+    
+    identities = create_identity_store()
+    app.state.identities = identities
+    
+    jobs = JobQueue(JOB_QUEUE_PATH, JOB_MAX_ATTEMPTS, JOB_RETENTION or None, JOB_PRUNE_INTERVAL)
+    app.state.jobs = jobs
+    workers = jobs.start_workers({"scrape_teacher": run_scrape_job}, JOB_WORKERS)
+    if index:
+        workers.append(asyncio.create_task(reconcile_proposal_index(strapi)))
+    if exporter:
+        workers.append(asyncio.create_task(exporter.run()))
     try:
-        proposal = await aggregate_teacher_data(teacher)
+        yield
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        jobs.close()
+        set_strapi(None)
+        if index:
+            index.close()
+        if watermarks:
+            watermarks.close()
+        if identities:
+            identities.close()
+        set_registry(None)
+        await clients.aclose()
+        shutdown_executor()
+        if exporter:
+            await exporter.aclose()
+        set_exporter(None)
+
+
+app = FastAPI(title="Teacher Data Aggregation Service", lifespan=lifespan)
+app.add_middleware(TracingMiddleware)
+
+
+async def load_watermarks(teacher: TeacherRequest) -> Optional[dict]:
+    store = app.state.watermarks
+    if not store or not teacher.incremental or not teacher.member_document_id:
+        return None
+    return await store.get_all(teacher.member_document_id)
+
+
+async def save_watermarks(proposal: DataProposal):
+    """Called only once the proposal has been delivered (or had nothing new), so no item is skipped for good."""
+    store = app.state.watermarks
+    if store and isinstance(proposal.member, str) and proposal.watermarks:
+        await store.update(proposal.member, proposal.watermarks)
+
+
+async def load_identities(teacher: TeacherRequest) -> Optional[dict]:
+    store = app.state.identities
+    if not store or not teacher.member_document_id:
+        return None
+    return await store.known(teacher.member_document_id)
+
+
+async def save_identities(proposal: DataProposal):
+    """Identities do not depend on the proposal being delivered, so they are kept right after aggregation."""
+    store = app.state.identities
+    if store and isinstance(proposal.member, str) and proposal.identities:
+        await store.update(proposal.member, proposal.identities)
+        print(f"Cached identities for member {proposal.member}: {', '.join(sorted(proposal.identities))}")
+
+
+async def process_teacher_scraping(teacher: TeacherRequest, timings: Optional[Dict[str, float]] = None) -> dict:
+    if timings is None:
+        timings = {}
+    
+    summary = {
+        "teacher": f"{teacher.first_name} {teacher.last_name}",
+        "member": teacher.member_document_id or teacher.teacher_id,
+        "status": "failed",
+        "scraped_items": 0,
+        "proposal_id": None,
+        "trace_id": current_trace_id()
+    }
+    
+    try:
+        started = time.perf_counter()
+        proposal = await aggregate_teacher_data(
+            teacher,
+            clients=app.state.clients,
+            watermarks=await load_watermarks(teacher),
+            identities=await load_identities(teacher)
+        )
+        timings["aggregate"] = round(time.perf_counter() - started, 3)
+        await save_identities(proposal)
+        summary["sources"] = {source: status.status for source, status in proposal.sources.items()}
         
         if isinstance(proposal.member, str):
-            existing_urls = await get_existing_urls(proposal.member)
-            print(f"Found {len(existing_urls)} existing URLs for member {proposal.member}")
+            started = time.perf_counter()
+            existing_urls = await known_urls(proposal.member, [item.url for item in proposal.scrapedData])
+            print(f"Found {len(existing_urls)} already proposed URLs for member {proposal.member}")
             
             original_count = len(proposal.scrapedData)
             proposal.scrapedData = [
@@ -21,25 +166,42 @@ async def process_teacher_scraping(teacher: TeacherRequest):
                 if item.url not in existing_urls
             ]
             print(f"Filtered out {original_count - len(proposal.scrapedData)} duplicate items")
+            timings["existing_urls"] = round(time.perf_counter() - started, 3)
         
         if not proposal.scrapedData:
             print("No new data to send to Strapi after deduplication")
-            return
+            await save_watermarks(proposal)
+            summary["status"] = "no_new_data"
+            return summary
 
         proposal_dict = {
             'member': proposal.member,
             'scrapedData': [data.model_dump() for data in proposal.scrapedData]
         }
         
+        started = time.perf_counter()
         result = await send_to_strapi(proposal_dict)
+        timings["send_to_strapi"] = round(time.perf_counter() - started, 3)
         
         if result:
             print(f"Successfully sent proposal to Strapi: {result.get('data', {}).get('id')}")
+            await save_watermarks(proposal)
+            summary["status"] = "sent"
+            summary["scraped_items"] = len(proposal.scrapedData)
+            summary["proposal_id"] = result.get('data', {}).get('id')
         else:
             print("Failed to send proposal to Strapi")
+            summary["error"] = "Failed to send proposal to Strapi"
         
     except Exception as e:
         print(f"Error processing teacher scraping: {e}")
+        summary["error"] = str(e)
+    
+    return summary
+
+
+async def run_scrape_job(payload: dict, timings: Dict[str, float]) -> dict:
+    return await process_teacher_scraping(TeacherRequest(**payload), timings)
 
 
 @app.get("/")
@@ -55,13 +217,12 @@ async def root():
 @app.get("/health")
 async def health_check():
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{STRAPI_URL}/health")
-            
-            return {
-                "status": "healthy",
-                "strapi_reachable": response.status_code == 200
-            }
+        response = await app.state.clients.get(f"{STRAPI_URL}/health", timeout=10.0)
+        
+        return {
+            "status": "healthy",
+            "strapi_reachable": response.status_code == 200
+        }
     except Exception as e:
         return {
             "status": "unhealthy",
@@ -69,24 +230,124 @@ async def health_check():
         }
 
 
+@app.get("/metrics")
+async def metrics():
+    for status, count in (await app.state.jobs.counts()).items():
+        JOB_QUEUE_DEPTH.labels(status).set(count)
+    
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    cache = app.state.clients.cache
+    if not cache:
+        return {"enabled": False}
+    
+    return {"enabled": True, **cache.summary()}
+
+
+@app.get("/api/rate-limits")
+async def rate_limits():
+    return app.state.clients.rate_limiter.snapshot()
+
+
+@app.get("/api/proposal-index/stats")
+async def proposal_index_stats():
+    index = app.state.strapi.index
+    if not index:
+        return {"enabled": False}
+    
+    return {"enabled": True, **index.summary()}
+
+
+@app.post("/api/proposal-index/reconcile")
+async def reconcile_proposal_index_now(member_document_id: Optional[str] = None):
+    """
+    Reconciles the local proposal index with Strapi for one member, or for every
+    member in the index when no member_document_id is given.
+    """
+    strapi = app.state.strapi
+    if not strapi.index:
+        raise HTTPException(status_code=400, detail="Proposal index is disabled")
+    
+    members = [member_document_id] if member_document_id else await strapi.index.members()
+    results = await strapi.reconcile_many(members)
+    
+    return {
+        "reconciled": sum(results.values()),
+        "failed": [member for member, ok in results.items() if not ok]
+    }
+
+@app.get("/api/sources")
+async def sources():
+    return describe_sources()
+
+
 @app.post("/api/scrape/teacher")
-async def scrape_teacher(teacher: TeacherRequest, background_tasks: BackgroundTasks):
+async def scrape_teacher(teacher: TeacherRequest):
     if not STRAPI_API_TOKEN:
         raise HTTPException(
             status_code=500,
             detail="STRAPI_API_TOKEN not configured"
         )
     
-    background_tasks.add_task(process_teacher_scraping, teacher)
+    job_id = await app.state.jobs.enqueue("scrape_teacher", teacher.model_dump())
     
     return {
-        "message": "Scraping job started",
+        "message": "Scraping job queued",
+        "job_id": job_id,
         "teacher": f"{teacher.first_name} {teacher.last_name}",
-        "status": "processing",
-        "note": "Results will be sent to Strapi when complete"
+        "status": "queued",
+        "note": "Results will be sent to Strapi when complete; poll /api/jobs/{job_id} for progress"
     }
 
 
+@app.post("/api/scrape/teachers")
+async def scrape_teachers(teachers: List[TeacherRequest]):
+    """
+    Queues a whole batch of teachers. At most JOB_WORKERS are scraped at a time,
+    with each source additionally capped across the batch. Returns one job handle per teacher.
+    """
+    if not STRAPI_API_TOKEN:
+        raise HTTPException(
+            status_code=500,
+            detail="STRAPI_API_TOKEN not configured"
+        )
+    
+    if not teachers:
+        raise HTTPException(
+            status_code=400,
+            detail="No teachers provided"
+        )
+    
+    job_ids = await app.state.jobs.enqueue_many(
+        "scrape_teacher",
+        [teacher.model_dump() for teacher in teachers]
+    )
+    
+    return {
+        "message": "Batch scraping jobs queued",
+        "total": len(job_ids),
+        "jobs": [
+            {
+                "job_id": job_id,
+                "teacher": f"{teacher.first_name} {teacher.last_name}",
+                "status": "queued"
+            }
+            for job_id, teacher in zip(job_ids, teachers)
+        ]
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await app.state.jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+
 @app.post("/api/scrape/teacher/sync")
 async def scrape_teacher_sync(teacher: TeacherRequest):
     if not STRAPI_API_TOKEN:
@@ -96,10 +357,16 @@ async def scrape_teacher_sync(teacher: TeacherRequest):
         )
     
     try:
-        proposal = await aggregate_teacher_data(teacher)
+        proposal = await aggregate_teacher_data(
+            teacher,
+            clients=app.state.clients,
+            watermarks=await load_watermarks(teacher),
+            identities=await load_identities(teacher)
+        )
+        await save_identities(proposal)
         
         if isinstance(proposal.member, str):
-            existing_urls = await get_existing_urls(proposal.member)
+            existing_urls = await known_urls(proposal.member, [item.url for item in proposal.scrapedData])
             
             original_count = len(proposal.scrapedData)
             proposal.scrapedData = [
@@ -108,10 +375,13 @@ async def scrape_teacher_sync(teacher: TeacherRequest):
             ]
         
         if not proposal.scrapedData:
+            await save_watermarks(proposal)
             return {
                 "message": "No new data found (all duplicates)",
                 "strapi_response": None,
-                "scraped_items": 0
+                "scraped_items": 0,
+                "sources": proposal.sources,
+                "trace_id": current_trace_id()
             }
 
         proposal_dict = {
@@ -122,10 +392,13 @@ async def scrape_teacher_sync(teacher: TeacherRequest):
         result = await send_to_strapi(proposal_dict)
         
         if result:
+            await save_watermarks(proposal)
             return {
                 "message": "Scraping completed and sent to Strapi",
                 "strapi_response": result,
-                "scraped_items": len(proposal.scrapedData)
+                "scraped_items": len(proposal.scrapedData),
+                "sources": proposal.sources,
+                "trace_id": current_trace_id()
             }
         else:
             raise HTTPException(
@@ -140,6 +413,99 @@ async def scrape_teacher_sync(teacher: TeacherRequest):
         )
 
 
+@app.post("/api/scrape/teacher/stream")
+async def scrape_teacher_stream(teacher: TeacherRequest, request: Request):
+    """
+    Streams scored items per source as each scraper finishes, followed by a summary event
+    with the deduplicated proposal. Nothing is sent to Strapi.
+    Responds with NDJSON, or with Server-Sent Events when the client accepts text/event-stream.
+    """
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    
+    async def events():
+        watermarks = await load_watermarks(teacher)
+        identities = await load_identities(teacher)
+        async for event in stream_teacher_data(teacher, clients=app.state.clients, watermarks=watermarks, identities=identities):
+            payload = json.dumps(event, default=str)
+            if use_sse:
+                yield f"event: {event['event']}\ndata: {payload}\n\n"
+            else:
+                yield payload + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/watermarks/{member_document_id}")
+async def get_watermarks(member_document_id: str):
+    store = app.state.watermarks
+    if not store:
+        return {"enabled": False}
+    
+    return {"enabled": True, "watermarks": await store.get_all(member_document_id)}
+
+
+@app.delete("/api/watermarks/{member_document_id}")
+async def reset_watermarks(member_document_id: str, source: Optional[str] = None):
+    """Forgets a member's watermarks (or one source's), so the next scrape is a full one."""
+    store = app.state.watermarks
+    if not store:
+        raise HTTPException(status_code=400, detail="Watermarks are disabled")
+    
+    await store.clear(member_document_id, source)
+    return {"status": "reset", "member": member_document_id, "source": source}
+
+
+def check_identity_keys(keys):
+    unknown = [key for key in keys if key not in IDENTITY_KEYS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown identity keys: {', '.join(unknown)} (expected {', '.join(IDENTITY_KEYS)})"
+        )
+
+
+@app.get("/api/identities/{member_document_id}")
+async def get_identities(member_document_id: str):
+    store = app.state.identities
+    if not store:
+        return {"enabled": False}
+    
+    return {"enabled": True, "identities": await store.get_all(member_document_id)}
+
+
+@app.put("/api/identities/{member_document_id}")
+async def override_identities(member_document_id: str, values: Dict[str, Optional[str]]):
+    """
+    Pins a member's identifiers, e.g. {"orcid": "0000-0002-1825-0097"}; scrapes never replace
+    pinned ones. A null value forgets that identifier, so the next scrape searches for it again.
+    """
+    store = app.state.identities
+    if not store:
+        raise HTTPException(status_code=400, detail="Identity cache is disabled")
+    check_identity_keys(values)
+    
+    for key, value in values.items():
+        if value is None:
+            await store.clear(member_document_id, key)
+    await store.pin(member_document_id, {key: value for key, value in values.items() if value is not None})
+    return {"status": "updated", "member": member_document_id, "identities": await store.get_all(member_document_id)}
+
+
+@app.delete("/api/identities/{member_document_id}")
+async def reset_identities(member_document_id: str, key: Optional[str] = None):
+    """Forgets a member's identities (or one of them), pinned ones included."""
+    store = app.state.identities
+    if not store:
+        raise HTTPException(status_code=400, detail="Identity cache is disabled")
+    if key is not None:
+        check_identity_keys([key])
+    
+    await store.clear(member_document_id, key)
+    return {"status": "reset", "member": member_document_id, "key": key}
 
 @app.post("/api/update-member-profile")
 async def update_member_profile(teacher: TeacherRequest):
@@ -153,7 +519,8 @@ async def update_member_profile(teacher: TeacherRequest):
     print(f"Received request to update profile for: {teacher.first_name} {teacher.last_name} (ID: {teacher.member_document_id})")
     
     try:
-        results = await scrape_skos_data(teacher.first_name, teacher.last_name)
+        known = await load_identities(teacher) or {}
+        results = await scrape_skos_data(teacher.first_name, teacher.last_name, known.get('skos'))
         
         if not results:
             print("No SKOS data found for this member.")
@@ -162,6 +529,10 @@ async def update_member_profile(teacher: TeacherRequest):
         skos_entry = results[0]
         raw_data = skos_entry.get('raw_data', {})
         
+        store = app.state.identities
+        if store and teacher.member_document_id and raw_data.get('url') and raw_data['url'] != known.get('skos'):
+            await store.update(teacher.member_document_id, {'skos': {'value': raw_data['url'], 'confidence': 1.0}})
+        
         if not teacher.member_document_id:
             print("No member_document_id provided, skipping Strapi update.")
             return {
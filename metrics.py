@@ -0,0 +1,57 @@
+from contextvars import ContextVar
+from prometheus_client import Counter, Gauge, Histogram
+
+# Source whose scraper is running in the current task; run_limited sets it, and
+# outbound HTTP calls made from that task (and tasks it spawns) are labelled with it.
+current_source: ContextVar[str] = ContextVar('current_source', default='none')
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+STAGE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'scraper_http_request_duration_seconds',
+    'Outbound HTTP request latency, per attempt',
+    ['source', 'host', 'method'],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_RESPONSE_BYTES = Counter(
+    'scraper_http_response_bytes_total',
+    'Bytes of outbound HTTP response bodies',
+    ['source', 'host']
+)
+HTTP_RESPONSES = Counter(
+    'scraper_http_responses_total',
+    'Outbound HTTP responses by status code',
+    ['source', 'host', 'status']
+)
+
+SOURCE_SECONDS = Histogram(
+    'scraper_source_duration_seconds',
+    'Time for one source to finish for one teacher',
+    ['source', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+ITEMS = Counter(
+    'scraper_items_total',
+    'Items per source at each pipeline stage: scraped, confident (after filtering), kept (after dedup)',
+    ['source', 'stage']
+)
+STAGE_SECONDS = Histogram(
+    'scraper_stage_duration_seconds',
+    'Time spent in CPU-bound pipeline stages',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+
+STRAPI_REQUEST_SECONDS = Histogram(
+    'scraper_strapi_request_duration_seconds',
+    'Strapi call latency including retries',
+    ['method', 'endpoint', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    'scraper_job_queue_jobs',
+    'Scraping jobs in the durable queue by status',
+    ['status']
+)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 
@@ -10,6 +10,8 @@ class TeacherRequest(BaseModel):
     member_document_id: Optional[str] = None
     current_institution: Optional[str] = None
     field_of_study: Optional[str] = None
+    deadline: Optional[float] = Field(default=None, ge=0)
+    incremental: bool = True
 
 
 class ScrapedData(BaseModel):
@@ -24,7 +26,22 @@ class ScrapedData(BaseModel):
     raw_data: dict = {}
 
 
+COMPLETE = "complete"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+
+class SourceStatus(BaseModel):
+    status: str
+    elapsed: Optional[float] = None
+    items: int = 0
+    error: Optional[str] = None
+
+
 class DataProposal(BaseModel):
     member: Optional[str | int] = None
     scrapedData: List[ScrapedData]
     createdAt: datetime
+    sources: Dict[str, SourceStatus] = {}
+    watermarks: Dict[str, Any] = {}
+    identities: Dict[str, Any] = {}
@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+import asyncio
+import logging
+import multiprocessing
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def start_executor(workers: int):
+    """
+    Starts the process pool used for HTML/XML parsing. With 0 workers parsing stays inline,
+    which is also what scripts running outside the app get.
+    """
+    global _executor
+    if workers > 0 and _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_parse(func: Callable[..., T], *args) -> T:
+    """
+    Runs a pure parsing function off the event loop. `func` must be a module-level
+    function taking and returning plain (picklable) values.
+    """
+    with span(f"parse {func.__name__}", inline=_executor is None):
+        if _executor is None:
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_executor, func, *args)
+        except BrokenProcessPool:
+            logger.error(f"Parser pool is broken, parsing {func.__name__} inline")
+            return func(*args)
@@ -0,0 +1,203 @@
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import math
+import time
+from sqlite_store import SQLiteStore, open_store
+from config import (
+    PROPOSAL_INDEX_ENABLED,
+    PROPOSAL_INDEX_PATH,
+    PROPOSAL_INDEX_MAX_AGE,
+    PROPOSAL_INDEX_BLOOM_CAPACITY,
+    PROPOSAL_INDEX_BLOOM_ERROR_RATE
+)
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. A negative answer is certain, a positive one
+    may be false with roughly `error_rate` probability at `capacity` entries.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def _key(member: str, url: str) -> str:
+    return f"{member}\0{url}"
+
+
+class ProposalIndex(SQLiteStore):
+    """
+    Local SQLite index of (member, url) pairs already proposed to Strapi, so the send path
+    can drop known URLs without a Strapi round trip. A member is warm once it has been
+    reconciled with Strapi within `max_age`; cold members fall back to Strapi.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS proposed_urls (
+            member TEXT NOT NULL,
+            url TEXT NOT NULL,
+            proposed_at REAL NOT NULL,
+            PRIMARY KEY (member, url)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS members (
+            member TEXT PRIMARY KEY,
+            reconciled_at REAL NOT NULL
+        )
+        """
+    )
+
+    def __init__(
+        self,
+        path: str,
+        max_age: float = PROPOSAL_INDEX_MAX_AGE,
+        bloom_capacity: int = PROPOSAL_INDEX_BLOOM_CAPACITY,
+        bloom_error_rate: float = PROPOSAL_INDEX_BLOOM_ERROR_RATE
+    ):
+        super().__init__(path)
+        self.max_age = max_age
+        self.stats = {
+            'lookups': 0,
+            'bloom_negatives': 0,
+            'cold': 0,
+            'recorded': 0,
+            'reconciled': 0
+        }
+
+        self.bloom: Optional[BloomFilter] = None
+        if bloom_capacity > 0:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            for member, url in self._conn.execute("SELECT member, url FROM proposed_urls"):
+                self.bloom.add(_key(member, url))
+
+    def _is_warm(self, member: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reconciled_at FROM members WHERE member = ?",
+                (member,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] < self.max_age
+
+    def _known(self, member: str, urls: List[str]) -> set[str]:
+        if self.bloom is not None:
+            candidates = [url for url in urls if _key(member, url) in self.bloom]
+            self.stats['bloom_negatives'] += len(urls) - len(candidates)
+        else:
+            candidates = urls
+
+        known = set()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT url FROM proposed_urls WHERE member = ? AND url IN ({','.join('?' * len(chunk))})",
+                    (member, *chunk)
+                ).fetchall()
+            known.update(row[0] for row in rows)
+        return known
+
+    def _lookup(self, member: str, urls: List[str]) -> Optional[set[str]]:
+        self.stats['lookups'] += 1
+        if not self._is_warm(member):
+            self.stats['cold'] += 1
+            return None
+        return self._known(member, urls)
+
+    def _record(self, member: str, urls: Iterable[str]):
+        now = time.time()
+        urls = list(urls)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO proposed_urls VALUES (?, ?, ?)",
+                [(member, url, now) for url in urls]
+            )
+            self._conn.commit()
+        if self.bloom is not None:
+            for url in urls:
+                self.bloom.add(_key(member, url))
+        self.stats['recorded'] += len(urls)
+
+    def _reconcile(self, member: str, urls: Iterable[str]):
+        """Replaces the member's URLs with the set Strapi holds and marks the member warm."""
+        now = time.time()
+        urls = list(urls)
+        with self._lock:
+            self._conn.execute("DELETE FROM proposed_urls WHERE member = ?", (member,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO proposed_urls VALUES (?, ?, ?)",
+                [(member, url, now) for url in urls]
+            )
+            self._conn.execute("INSERT OR REPLACE INTO members VALUES (?, ?)", (member, now))
+            self._conn.commit()
+        if self.bloom is not None:
+            for url in urls:
+                self.bloom.add(_key(member, url))
+        self.stats['reconciled'] += 1
+
+    def _stale_members(self, limit: int) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT member FROM members WHERE reconciled_at < ? ORDER BY reconciled_at LIMIT ?",
+                (time.time() - self.max_age, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _members(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT member FROM members ORDER BY reconciled_at").fetchall()
+        return [row[0] for row in rows]
+
+    async def lookup(self, member: str, urls: List[str]) -> Optional[set[str]]:
+        """The subset of `urls` already proposed for a warm member, or None when the member is cold."""
+        return await self._run(self._lookup, member, urls)
+
+    async def record(self, member: str, urls: Iterable[str]):
+        await self._run(self._record, member, urls)
+
+    async def reconcile(self, member: str, urls: Iterable[str]):
+        await self._run(self._reconcile, member, urls)
+
+    async def stale_members(self, limit: int) -> List[str]:
+        return await self._run(self._stale_members, limit)
+
+    async def members(self) -> List[str]:
+        return await self._run(self._members)
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            pairs = self._conn.execute("SELECT COUNT(*) FROM proposed_urls").fetchone()[0]
+            members, warm = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(reconciled_at >= ?), 0) FROM members",
+                (time.time() - self.max_age,)
+            ).fetchone()
+        return {
+            **self.stats,
+            'pairs': pairs,
+            'members': members,
+            'warm_members': warm,
+            'bloom': self.bloom is not None
+        }
+
+
+def create_proposal_index() -> Optional[ProposalIndex]:
+    return open_store(lambda: ProposalIndex(PROPOSAL_INDEX_PATH), PROPOSAL_INDEX_ENABLED, PROPOSAL_INDEX_PATH, "proposal index")
@@ -0,0 +1,121 @@
+from typing import Dict, Optional, Tuple
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import time
+from config import RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_MIN_RPS
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket for one upstream host.
+    Waiters are served in arrival order because the lock is held while sleeping for a token.
+    The rate is halved on 429/503 and recovers gradually on successful responses.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float = RATE_LIMIT_MIN_RPS):
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def backoff(self, retry_after: Optional[float] = None):
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def recover(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate * 1.25)
+
+    def snapshot(self) -> dict:
+        return {
+            'rate': round(self.rate, 3),
+            'base_rate': self.base_rate,
+            'tokens': round(min(self.capacity, self.tokens + (time.monotonic() - self.updated_at) * self.rate), 2),
+            'blocked_for': round(max(0.0, self.blocked_until - time.monotonic()), 2)
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: Dict[str, Optional[Tuple[float, float]]] = RATE_LIMITS,
+        default: Optional[Tuple[float, float]] = RATE_LIMIT_DEFAULT
+    ):
+        self.limits = limits
+        self.default = default
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket_for(self, host: str) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            limit = self.limits[host] if host in self.limits else self.default
+            if not limit:
+                return None
+            bucket = TokenBucket(*limit)
+            self._buckets[host] = bucket
+        return bucket
+
+    async def acquire(self, host: str):
+        bucket = self.bucket_for(host)
+        if bucket:
+            await bucket.acquire()
+
+    def backoff(self, host: str, retry_after: Optional[float] = None):
+        bucket = self.bucket_for(host)
+        if bucket:
+            bucket.backoff(retry_after)
+            logger.warning(f"Rate limited by {host}, slowing down to {bucket.rate:.3f} req/s")
+
+    def recover(self, host: str):
+        bucket = self.bucket_for(host)
+        if bucket:
+            bucket.recover()
+
+    def snapshot(self) -> dict:
+        return {host: bucket.snapshot() for host, bucket in self._buckets.items()}
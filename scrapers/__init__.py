@@ -1,17 +1,24 @@
 from .google_scholar import scrape_google_scholar
-from .orcid import scrape_orcid_info
+from .orcid import scrape_orcid_info, is_identity_marker
 from .researchgate import scrape_researchgate
 from .university import scrape_university_websites
 from .dblp import scrape_dblp
 from .arxiv import scrape_arxiv
 from .semantic_scholar import scrape_semantic_scholar
+from .registry import SourceSpec, SOURCES, get_source, enabled_sources, describe_sources
 
 __all__ = [
     'scrape_google_scholar',
     'scrape_orcid_info',
+    'is_identity_marker',
     'scrape_researchgate',
     'scrape_university_websites',
     'scrape_dblp',
     'scrape_arxiv',
-    'scrape_semantic_scholar'
+    'scrape_semantic_scholar',
+    'SourceSpec',
+    'SOURCES',
+    'get_source',
+    'enabled_sources',
+    'describe_sources'
 ]
@@ -1,129 +1,228 @@
 from typing import List, Optional
-import httpx
+from http_client import ClientRegistry, get_registry
+import heapq
+import io
 import xml.etree.ElementTree as ET
-from utils import calculate_confidence_score
+from parsing import run_parse
+from utils import ConfidenceScorer, get_scorer
+
+
+PUB_TYPES = ['article', 'inproceedings', 'proceedings', 'book', 'incollection']
+
+
+def parse_dblp_publications(content: bytes, limit: int = 5, min_year: Optional[int] = None) -> List[dict]:
+    """
+    Streams a dblp person XML and returns the `limit` newest publications as plain dicts.
+    Only a top-k heap is kept; every element is cleared once read, so memory does not grow
+    with the size of the bibliography. Ties on year keep the publication type order, then document order.
+    Publications older than `min_year` are skipped.
+    """
+    heap = []
+    seq = 0
+    depth = 0
+    root = None
+
+    for event, elem in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+
+        if elem.tag in PUB_TYPES:
+            year_elem = elem.find('year')
+            year = int(year_elem.text) if year_elem is not None and year_elem.text else 0
+            key = (year, -PUB_TYPES.index(elem.tag), -seq)
+            seq += 1
+
+            is_new = not min_year or year >= min_year
+            if is_new and (len(heap) < limit or key > heap[0][0]):
+                title_elem = elem.find('title')
+
+                venue = None
+                for venue_tag in ['journal', 'booktitle', 'publisher']:
+                    venue_elem = elem.find(venue_tag)
+                    if venue_elem is not None and venue_elem.text:
+                        venue = venue_elem.text
+                        break
+
+                ee_elem = elem.find('ee')
+
+                pub = {
+                    'title': title_elem.text if title_elem is not None else "No title",
+                    'authors': [a.text for a in elem.findall('author') if a.text],
+                    'venue': venue,
+                    'url': ee_elem.text if ee_elem is not None else "",
+                    'year': year,
+                    'type': elem.tag
+                }
+
+                if len(heap) < limit:
+                    heapq.heappush(heap, (key, pub))
+                else:
+                    heapq.heapreplace(heap, (key, pub))
+
+            elem.clear()
+
+        if depth == 1 and root is not None:
+            root.clear()
+
+    return [pub for _, pub in sorted(heap, key=lambda entry: entry[0], reverse=True)]
+
+
+async def fetch_dblp_person(
+    http: ClientRegistry,
+    author_url: str,
+    profile_confidence: float,
+    scorer: ConfidenceScorer,
+    since: Optional[int] = None
+) -> Optional[List[dict]]:
+    """
+    Newest publications of one dblp person page as scraped items, or None when the page could
+    not be fetched. Below 0.8 profile confidence each item is re-scored on its own text.
+    """
+    pub_response = await http.get(f"{author_url}.xml")
+    
+    if pub_response.status_code != 200:
+        return None
+    
+    publications = await run_parse(parse_dblp_publications, pub_response.content, 5, since)
+    results = []
+    pending = []
+    
+    for pub in publications:
+        try:
+            title = pub['title']
+            authors_str = ', '.join(pub['authors'])
+            venue = pub['venue']
+            url = pub['url']
+            year = pub['year']
+            
+            if profile_confidence < 0.8:
+                pending.append((len(results), (authors_str, None, f"{title} {authors_str} {venue or ''}")))
+            
+            results.append({
+                'source': 'dblp',
+                'url': url or f"https://dblp.org/search?q={title.replace(' ', '+')}",
+                'title': title,
+                'description': f"Published in {venue or 'unknown venue'} ({year})",
+                'authors': authors_str,
+                'confidenceScore': profile_confidence,
+                'raw_data': {
+                    'full_authors': authors_str,
+                    'venue': venue,
+                    'year': year,
+                    'type': pub['type'],
+                    'dblp_url': author_url,
+                    'profile_confidence': profile_confidence
+                }
+            })
+            
+        except Exception as pub_error:
+            print(f"Error processing dblp publication: {pub_error}")
+            continue
+    
+    scores = scorer.score_batch([item for _, item in pending])
+    for (index, _), score in zip(pending, scores):
+        results[index]['confidenceScore'] = float(score)
+    
+    return results
+
+
+async def resolve_dblp_person(http: ClientRegistry, orcid_id: str) -> Optional[str]:
+    """dblp person URL (without extension) for an ORCID iD, from dblp's ORCID redirect."""
+    response = await http.get(f"https://dblp.org/orcid/{orcid_id}")
+    
+    if response.is_redirect:
+        location = str(response.url.join(response.headers.get('location', '')))
+    elif response.status_code == 200 and '/pid/' in str(response.url):
+        location = str(response.url)
+    else:
+        return None
+    
+    if '/pid/' not in location:
+        return None
+    return location.split('?')[0].removesuffix('.html').removesuffix('.xml')
 
 
 async def scrape_dblp(
     first_name: str,
     last_name: str,
     institution: Optional[str] = None,
-    field_of_study: Optional[str] = None
+    field_of_study: Optional[str] = None,
+    clients: Optional[ClientRegistry] = None,
+    since: Optional[int] = None,
+    identity: Optional[dict] = None
 ) -> List[dict]:
     """
     Scrape dblp Computer Science Bibliography
     API Docs: https://dblp.org/faq/How+to+use+the+dblp+search+API.html
+    The person XML has no date filter, so `since` (a year) is applied while parsing.
+    With a resolved ORCID `identity` the person page is looked up directly instead of searching by name,
+    and a cached dblp person URL in `identity` is fetched without any lookup.
     """
     results = []
     full_name = f"{first_name} {last_name}"
+    scorer = get_scorer(full_name, institution, field_of_study)
     
     try:
+        http = clients or get_registry()
+        
+        if identity and identity.get('dblp'):
+            print(f"Using known dblp person {identity['dblp']} for {full_name}")
+            person_results = await fetch_dblp_person(http, identity['dblp'], identity.get('confidence', 0.8), scorer, since)
+            if person_results is not None:
+                print(f"Found {len(person_results)} results from dblp")
+                return person_results
+            print(f"Known dblp person {identity['dblp']} could not be fetched, searching")
+        
+        if identity and identity.get('orcid'):
+            author_url = await resolve_dblp_person(http, identity['orcid'])
+            if author_url:
+                print(f"Found dblp person for ORCID {identity['orcid']}: {author_url}")
+                person_results = await fetch_dblp_person(http, author_url, identity.get('confidence', 0.8), scorer, since)
+                if person_results is not None:
+                    print(f"Found {len(person_results)} results from dblp")
+                    return person_results
+            print(f"No dblp person for ORCID {identity['orcid']}, searching by name")
+        
         print(f"Searching dblp for: {full_name}")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            search_url = "https://dblp.org/search/author/api"
-            params = {
-                "q": full_name,
-                "format": "json",
-                "h": 10
-            }
+        search_url = "https://dblp.org/search/author/api"
+        params = {
+            "q": full_name,
+            "format": "json",
+            "h": 10
+        }
+        
+        response = await http.get(search_url, params=params)
+        
+        if response.status_code == 200:
+            data = response.json()
             
-            response = await client.get(search_url, params=params)
+            hits = data.get('result', {}).get('hits', {}).get('hit', [])
             
-            if response.status_code == 200:
-                data = response.json()
+            for hit in hits[:3]:
+                info = hit.get('info', {})
+                author_name = info.get('author', '')
+                author_url = info.get('url', '')
                 
-                hits = data.get('result', {}).get('hits', {}).get('hit', [])
+                profile_confidence = scorer.score(author_name)
                 
-                for hit in hits[:3]:
-                    info = hit.get('info', {})
-                    author_name = info.get('author', '')
-                    author_url = info.get('url', '')
-                    
-                    profile_confidence = calculate_confidence_score(
-                        author_name,
-                        full_name,
-                        scraped_institution=None,
-                        target_institution=None
-                    )
-                    
-                    print(f"Found dblp author: {author_name} - confidence: {profile_confidence:.2f}")
-                    
-                    if profile_confidence < 0.40:
-                        continue
+                print(f"Found dblp author: {author_name} - confidence: {profile_confidence:.2f}")
+                
+                if profile_confidence < 0.40:
+                    continue
+                
+                if author_url:
+                    person_results = await fetch_dblp_person(http, author_url, profile_confidence, scorer, since)
                     
-                    if author_url:
-                        pub_response = await client.get(f"{author_url}.xml")
-                        
-                        if pub_response.status_code == 200:
-                            root = ET.fromstring(pub_response.content)
-                            
-                            pubs = []
-                            for pub_type in ['article', 'inproceedings', 'proceedings', 'book', 'incollection']:
-                                pubs.extend(root.findall(f".//{pub_type}"))
-                            
-                            pubs_with_year = []
-                            for pub in pubs:
-                                year_elem = pub.find('year')
-                                year = int(year_elem.text) if year_elem is not None and year_elem.text else 0
-                                pubs_with_year.append((year, pub))
-                            
-                            pubs_with_year.sort(reverse=True, key=lambda x: x[0])
-                            
-                            for year, pub in pubs_with_year[:5]:
-                                try:
-                                    title_elem = pub.find('title')
-                                    title = title_elem.text if title_elem is not None else "No title"
-                                    
-                                    authors = []
-                                    for author_elem in pub.findall('author'):
-                                        if author_elem.text:
-                                            authors.append(author_elem.text)
-                                    authors_str = ', '.join(authors)
-                                    
-                                    venue = None
-                                    for venue_tag in ['journal', 'booktitle', 'publisher']:
-                                        venue_elem = pub.find(venue_tag)
-                                        if venue_elem is not None and venue_elem.text:
-                                            venue = venue_elem.text
-                                            break
-                                    
-                                    ee_elem = pub.find('ee')
-                                    url = ee_elem.text if ee_elem is not None else ""
-                                    
-                                    if profile_confidence >= 0.8:
-                                        confidence = profile_confidence
-                                    else:
-                                        confidence = calculate_confidence_score(
-                                            authors_str,
-                                            full_name,
-                                            scraped_institution=None,
-                                            target_institution=institution,
-                                            scraped_text=f"{title} {authors_str} {venue or ''}",
-                                            field_of_study=field_of_study
-                                        )
-                                    
-                                    results.append({
-                                        'source': 'dblp',
-                                        'url': url or f"https://dblp.org/search?q={title.replace(' ', '+')}",
-                                        'title': title,
-                                        'description': f"Published in {venue or 'unknown venue'} ({year})",
-                                        'authors': authors_str,
-                                        'confidenceScore': confidence,
-                                        'raw_data': {
-                                            'full_authors': authors_str,
-                                            'venue': venue,
-                                            'year': year,
-                                            'type': pub.tag
-                                        }
-                                    })
-                                    
-                                except Exception as pub_error:
-                                    print(f"Error processing dblp publication: {pub_error}")
-                                    continue
-                            
-                            if results:
-                                break
+                    # An empty page under `since` means nothing new, not a different person
+                    if person_results is not None:
+                        results = person_results
+                        break
         
         print(f"Found {len(results)} results from dblp")
         
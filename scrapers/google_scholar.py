@@ -1,76 +1,103 @@
 from typing import List, Optional
-import httpx
+import re
+from http_client import ClientRegistry, get_registry
 from bs4 import BeautifulSoup
-from utils import calculate_confidence_score
+from parsing import run_parse
+from utils import get_scorer
+
+
+def parse_google_scholar_results(html: str, search_url: str, limit: int = 5) -> List[dict]:
+    """Parses a Google Scholar results page into plain publication dicts."""
+    soup = BeautifulSoup(html, 'html.parser')
+    publications = []
+    
+    for pub in soup.find_all('div', class_='gs_ri')[:limit]:
+        title_elem = pub.find('h3', class_='gs_rt')
+        snippet_elem = pub.find('div', class_='gs_rs')
+        
+        if title_elem:
+            title = title_elem.get_text()
+            snippet = snippet_elem.get_text() if snippet_elem else ""
+            link = title_elem.find('a')
+            url = link['href'] if link and link.get('href') else search_url
+            
+            authors_elem = pub.find('div', class_='gs_a')
+            authors = authors_elem.get_text() if authors_elem else ""
+            
+            scraped_institution = None
+            if authors_elem:
+                parts = authors.split('-')
+                if len(parts) > 1:
+                    scraped_institution = parts[1].strip()
+            
+            years = re.findall(r'\b(?:19|20)\d{2}\b', authors)
+            
+            publications.append({
+                'title': title,
+                'snippet': snippet,
+                'url': url,
+                'authors': authors,
+                'institution': scraped_institution,
+                'year': int(years[-1]) if years else None
+            })
+    
+    return publications
 
 
 async def scrape_google_scholar(
     first_name: str,
     last_name: str,
     institution: Optional[str] = None,
-    field_of_study: Optional[str] = None
+    field_of_study: Optional[str] = None,
+    clients: Optional[ClientRegistry] = None,
+    since: Optional[int] = None
 ) -> List[dict]:
     results = []
     full_name = f"{first_name} {last_name}"
+    scorer = get_scorer(full_name, institution, field_of_study)
 
     print(f"Searching Google Scholar for: {full_name}")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            search_url = f"https://scholar.google.com/scholar?q={full_name.replace(' ', '+')}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = await client.get(search_url, headers=headers)
+        http = clients or get_registry()
+        search_url = f"https://scholar.google.com/scholar?q={full_name.replace(' ', '+')}"
+        if since:
+            search_url += f"&as_ylo={since}"
+        
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        
+        response = await http.get(search_url, headers=headers)
+        
+        if response.status_code == 200:
+            publications = await run_parse(parse_google_scholar_results, response.text, search_url)
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+            for pub in publications:
+                title = pub['title']
+                snippet = pub['snippet']
+                authors = pub['authors']
                 
-                publications = soup.find_all('div', class_='gs_ri')[:5]
+                scraped_text = f"{title} {snippet} {authors}"
+                confidence = scorer.score(
+                    authors,
+                    scraped_institution=pub['institution'],
+                    scraped_text=scraped_text
+                )
                 
-                for pub in publications:
-                    title_elem = pub.find('h3', class_='gs_rt')
-                    snippet_elem = pub.find('div', class_='gs_rs')
-                    
-                    if title_elem:
-                        title = title_elem.get_text()
-                        snippet = snippet_elem.get_text() if snippet_elem else ""
-                        link = title_elem.find('a')
-                        url = link['href'] if link and link.get('href') else search_url
-                        
-                        authors_elem = pub.find('div', class_='gs_a')
-                        authors = authors_elem.get_text() if authors_elem else ""
-                        
-                        scraped_institution = None
-                        if authors_elem:
-                            parts = authors.split('-')
-                            if len(parts) > 1:
-                                scraped_institution = parts[1].strip()
-                        
-                        scraped_text = f"{title} {snippet} {authors}"
-                        confidence = calculate_confidence_score(
-                            authors,
-                            full_name,
-                            scraped_institution=scraped_institution,
-                            target_institution=institution,
-                            scraped_text=scraped_text,
-                            field_of_study=field_of_study
-                        )
-                        
-                        results.append({
-                            'source': 'Google Scholar',
-                            'url': url,
-                            'title': title,
-                            'description': snippet,
-                            'authors': authors,
-                            'confidenceScore': confidence,
-                            'raw_data': {
-                                'full_authors': authors,
-                                'snippet': snippet
-                            }
-                        })
+                results.append({
+                    'source': 'Google Scholar',
+                    'url': pub['url'],
+                    'title': title,
+                    'description': snippet,
+                    'authors': authors,
+                    'confidenceScore': confidence,
+                    'raw_data': {
+                        'full_authors': authors,
+                        'snippet': snippet,
+                        'year': pub['year']
+                    }
+                })
 
         print(f"Found {len(results)} results from Google Scholar")
             
@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import (
+    RATE_LIMIT_DEFAULT,
+    RATE_LIMITS,
+    SOURCE_CONCURRENCY,
+    SOURCE_CONCURRENCY_DEFAULT,
+    SOURCES_DISABLED
+)
+from .google_scholar import scrape_google_scholar
+from .orcid import scrape_orcid_info
+from .researchgate import scrape_researchgate
+from .university import scrape_university_websites
+from .dblp import scrape_dblp
+from .arxiv import scrape_arxiv
+from .semantic_scholar import scrape_semantic_scholar
+
+
+# (first_name, last_name, institution, field_of_study, clients=..., since=...) -> scraped items
+ScrapeFunc = Callable[..., Awaitable[List[dict]]]
+
+# (scraped items, previous watermark) -> new watermark
+WatermarkFunc = Callable[[List[dict], Any], Any]
+
+# scraped items -> identifiers other sources can query by exactly, or None when unresolved
+IdentityFunc = Callable[[List[dict]], Optional[Dict[str, Any]]]
+
+
+def latest_year(items: List[dict], previous: Optional[int]) -> Optional[int]:
+    years = []
+    for item in items:
+        try:
+            years.append(int(item.get('raw_data', {}).get('year')))
+        except (TypeError, ValueError):
+            continue
+    return max([*years, previous or 0]) or None
+
+
+def latest_date(items: List[dict], previous: Optional[str]) -> Optional[str]:
+    dates = [item.get('raw_data', {}).get('published') for item in items]
+    return max([date for date in dates if date] + ([previous] if previous else []), default=None)
+
+
+def latest_orcid_modified(items: List[dict], previous: Optional[Dict[str, int]]) -> Optional[Dict[str, int]]:
+    watermark = dict(previous or {})
+    for item in items:
+        raw_data = item.get('raw_data', {})
+        orcid_id, modified = raw_data.get('orcid_id'), raw_data.get('works_modified')
+        if orcid_id and modified:
+            watermark[orcid_id] = max(modified, watermark.get(orcid_id, 0))
+    return watermark or None
+
+
+def orcid_identity(items: List[dict]) -> Optional[Dict[str, Any]]:
+    """
+    The ORCID iD of the candidate matched by institution, with the DOIs of its works.
+    None when no candidate or more than one matched, since the identity is then ambiguous.
+    A record whose works were unchanged contributes only its identity marker, so no DOIs.
+    """
+    matched: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        raw_data = item.get('raw_data', {})
+        orcid_id = raw_data.get('orcid_id')
+        if not orcid_id or not raw_data.get('institution_match'):
+            continue
+        identity = matched.setdefault(orcid_id, {
+            'orcid': orcid_id,
+            'confidence': item.get('confidenceScore', 0),
+            'dois': []
+        })
+        if raw_data.get('doi'):
+            identity['dois'].append(raw_data['doi'])
+    return next(iter(matched.values())) if len(matched) == 1 else None
+
+
+def profile_identity(key: str, field: str) -> IdentityFunc:
+    """The profile a source's items came from (raw_data[field]), with its profile confidence, as {key: ...}."""
+    def identity(items: List[dict]) -> Optional[Dict[str, Any]]:
+        profiles = {
+            item['raw_data'][field]: item['raw_data'].get('profile_confidence', 0)
+            for item in items
+            if item.get('raw_data', {}).get(field)
+        }
+        if len(profiles) != 1:
+            return None
+        value, confidence = next(iter(profiles.items()))
+        return {key: value, 'confidence': confidence}
+    return identity
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """
+    One scraping source. `cost` is the expected number of upstream requests per teacher
+    (a full name-search scrape), `concurrency` caps in-flight calls across all teachers and
+    `rate_limits` maps each host the source talks to onto the (requests per second, burst)
+    token bucket the RateLimiter applies to it (config.RATE_LIMITS, else RATE_LIMIT_DEFAULT;
+    None when the host is exempt).
+    Sources with a `watermark` function support incremental scraping: the previous
+    watermark is passed to `scrape` as `since`, and the function derives the next one.
+    An `identity` function makes the source an identity resolver; sources listing it in
+    `depends_on` start once it resolves and get the merged identifiers as `identity`.
+    `identity_key` names the identifier the source resolves in the per-member identity cache;
+    when it is already cached the source gets it as `identity` and skips its name search.
+    """
+    name: str
+    scrape: ScrapeFunc
+    enabled: bool = True
+    cost: float = 1.0
+    concurrency: int = SOURCE_CONCURRENCY_DEFAULT
+    rate_limits: Tuple[Tuple[str, Optional[Tuple[float, float]]], ...] = ()
+    watermark: Optional[WatermarkFunc] = None
+    identity: Optional[IdentityFunc] = None
+    depends_on: Tuple[str, ...] = ()
+    identity_key: Optional[str] = None
+
+
+def _source(
+    name: str,
+    scrape: ScrapeFunc,
+    cost: float,
+    hosts: Tuple[str, ...] = (),
+    watermark: Optional[WatermarkFunc] = None,
+    identity: Optional[IdentityFunc] = None,
+    depends_on: Tuple[str, ...] = (),
+    identity_key: Optional[str] = None
+) -> SourceSpec:
+    return SourceSpec(
+        name=name,
+        scrape=scrape,
+        enabled=name not in SOURCES_DISABLED,
+        cost=cost,
+        concurrency=SOURCE_CONCURRENCY.get(name, SOURCE_CONCURRENCY_DEFAULT),
+        rate_limits=tuple((host, RATE_LIMITS[host] if host in RATE_LIMITS else RATE_LIMIT_DEFAULT) for host in hosts),
+        watermark=watermark,
+        identity=identity,
+        depends_on=depends_on,
+        identity_key=identity_key
+    )
+
+
+# Registration order is the order results are merged in, which deduplication depends on.
+SOURCES: Dict[str, SourceSpec] = {
+    spec.name: spec
+    for spec in (
+        _source('Google Scholar', scrape_google_scholar, 1, ('scholar.google.com',), latest_year),
+        _source('University', scrape_university_websites, 0),
+        _source('ResearchGate', scrape_researchgate, 1, ('www.researchgate.net',)),
+        _source(
+            'ORCID', scrape_orcid_info, 11, ('pub.orcid.org',), latest_orcid_modified,
+            identity=orcid_identity, identity_key='orcid'
+        ),
+        _source(
+            'dblp', scrape_dblp, 4, ('dblp.org',), latest_year,
+            identity=profile_identity('dblp', 'dblp_url'), depends_on=('ORCID',), identity_key='dblp'
+        ),
+        _source('arXiv', scrape_arxiv, 1, ('export.arxiv.org',), latest_date),
+        _source(
+            'Semantic Scholar', scrape_semantic_scholar, 4, ('api.semanticscholar.org',), latest_year,
+            identity=profile_identity('semantic_scholar', 'author_id'), depends_on=('ORCID',), identity_key='semantic_scholar'
+        ),
+    )
+}
+
+
+def get_source(name: str) -> Optional[SourceSpec]:
+    return SOURCES.get(name)
+
+
+def enabled_sources() -> List[SourceSpec]:
+    return [spec for spec in SOURCES.values() if spec.enabled]
+
+
+def describe_sources() -> List[dict]:
+    return [
+        {
+            'name': spec.name,
+            'enabled': spec.enabled,
+            'cost': spec.cost,
+            'concurrency': spec.concurrency,
+            'incremental': spec.watermark is not None,
+            'resolves_identity': spec.identity is not None,
+            'depends_on': list(spec.depends_on),
+            'identity_key': spec.identity_key,
+            'rate_limits': {
+                host: {'rps': limit[0], 'burst': limit[1]} if limit else None
+                for host, limit in spec.rate_limits
+            }
+        }
+        for spec in SOURCES.values()
+    ]
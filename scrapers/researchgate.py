@@ -1,5 +1,5 @@
 from typing import List, Optional
-import httpx
+from http_client import ClientRegistry, get_registry
 from bs4 import BeautifulSoup
 
 
@@ -7,26 +7,28 @@ async def scrape_researchgate(
     first_name: str,
     last_name: str,
     institution: Optional[str] = None,
-    field_of_study: Optional[str] = None
+    field_of_study: Optional[str] = None,
+    clients: Optional[ClientRegistry] = None,
+    since: Optional[object] = None
 ) -> List[dict]:
     results = []
     full_name = f"{first_name} {last_name}"
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            search_url = f"https://www.researchgate.net/search/researcher?q={full_name.replace(' ', '%20')}"
+        http = clients or get_registry()
+        search_url = f"https://www.researchgate.net/search/researcher?q={full_name.replace(' ', '%20')}"
+        
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        
+        response = await http.get(search_url, headers=headers)
+        
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.text, 'html.parser')
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = await client.get(search_url, headers=headers)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+            pass
                 
-                pass
-                    
     except Exception as e:
         print(f"Error scraping ResearchGate: {e}")
     
@@ -1,120 +1,193 @@
 from typing import List, Optional
-import httpx
-from utils import calculate_confidence_score
+from http_client import ClientRegistry, get_registry
+from utils import ConfidenceScorer, get_scorer
+
+
+API_URL = "https://api.semanticscholar.org/graph/v1"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Academic Research Bot)"
+}
+
+
+async def fetch_author_papers(
+    http: ClientRegistry,
+    author_id: str,
+    profile_confidence: float,
+    scorer: ConfidenceScorer,
+    since: Optional[int] = None
+) -> Optional[List[dict]]:
+    """
+    An author's papers as scraped items, or None when the request failed.
+    Below 0.8 profile confidence each item is re-scored on its own text.
+    """
+    papers_url = f"{API_URL}/author/{author_id}/papers"
+    papers_params = {
+        "limit": 5,
+        "fields": "title,authors,year,abstract,url,venue,citationCount"
+    }
+    if since:
+        papers_params["publicationDateOrYear"] = f"{since}:"
+    
+    papers_response = await http.get(papers_url, params=papers_params, headers=HEADERS)
+    
+    if papers_response.status_code != 200:
+        print(f"Semantic Scholar papers request failed for {author_id}: {papers_response.status_code}")
+        return None
+    
+    papers_data = papers_response.json()
+    papers = papers_data.get('data', [])
+    results = []
+    pending = []
+    
+    for paper in papers:
+        try:
+            title = paper.get('title', 'No title')
+            abstract = paper.get('abstract', '')
+            year = paper.get('year', '')
+            url = paper.get('url', '')
+            venue = paper.get('venue', '')
+            citation_count = paper.get('citationCount', 0)
+            
+            if since and year and year < since:
+                continue
+            
+            authors_list = paper.get('authors', [])
+            authors_str = ', '.join([a.get('name', '') for a in authors_list])
+            
+            if profile_confidence < 0.8:
+                pending.append((len(results), (authors_str, None, f"{title} {abstract} {authors_str} {venue}")))
+            
+            results.append({
+                'source': 'Semantic Scholar',
+                'url': url or f"https://www.semanticscholar.org/paper/{paper.get('paperId', '')}",
+                'title': title,
+                'description': abstract[:500] if abstract else f"Published in {venue} ({year})",
+                'authors': authors_str,
+                'confidenceScore': profile_confidence,
+                'raw_data': {
+                    'full_authors': authors_str,
+                    'abstract': abstract,
+                    'venue': venue,
+                    'year': year,
+                    'citation_count': citation_count,
+                    'author_id': author_id,
+                    'profile_confidence': profile_confidence
+                }
+            })
+        
+        except Exception as paper_error:
+            print(f"Error processing Semantic Scholar paper: {paper_error}")
+            continue
+    
+    scores = scorer.score_batch([item for _, item in pending])
+    for (index, _), score in zip(pending, scores):
+        results[index]['confidenceScore'] = float(score)
+    
+    return results
+
+
+async def resolve_author_by_doi(http: ClientRegistry, dois: List[str], scorer: ConfidenceScorer) -> Optional[str]:
+    """
+    Semantic Scholar authorId of the teacher, read from the author list of one of their
+    ORCID-verified papers: the co-author whose name matches best (at least 0.40, as for search hits).
+    """
+    for doi in dois[:2]:
+        response = await http.get(f"{API_URL}/paper/DOI:{doi}", params={"fields": "authors"}, headers=HEADERS)
+        if response.status_code != 200:
+            continue
+        
+        authors = [author for author in response.json().get('authors', []) if author.get('authorId')]
+        if not authors:
+            continue
+        
+        best = max(authors, key=lambda author: scorer.score(author.get('name', '')))
+        if scorer.score(best.get('name', '')) >= 0.40:
+            return best['authorId']
+    
+    return None
 
 
 async def scrape_semantic_scholar(
     first_name: str,
     last_name: str,
     institution: Optional[str] = None,
-    field_of_study: Optional[str] = None
+    field_of_study: Optional[str] = None,
+    clients: Optional[ClientRegistry] = None,
+    since: Optional[int] = None,
+    identity: Optional[dict] = None
 ) -> List[dict]:
     """
     Scrape Semantic Scholar using their free API
     API Docs: https://api.semanticscholar.org/
     Note: Free tier has rate limits but no API key needed for basic usage
+    `since` (a year) restricts the papers to that year and later.
+    With a resolved ORCID `identity` the author is taken from one of its DOIs instead of a name search,
+    and a cached authorId in `identity` is used as it is.
     """
     results = []
     full_name = f"{first_name} {last_name}"
+    scorer = get_scorer(full_name, institution, field_of_study)
     
     try:
+        http = clients or get_registry()
+        
+        if identity and identity.get('semantic_scholar'):
+            author_id = identity['semantic_scholar']
+            print(f"Using known Semantic Scholar author {author_id} for {full_name}")
+            author_results = await fetch_author_papers(http, author_id, identity.get('confidence', 0.8), scorer, since)
+            if author_results is not None:
+                print(f"Found {len(author_results)} results from Semantic Scholar")
+                return author_results
+            print(f"Known Semantic Scholar author {author_id} could not be fetched, searching")
+        
+        if identity and identity.get('dois'):
+            author_id = await resolve_author_by_doi(http, identity['dois'], scorer)
+            if author_id:
+                print(f"Found Semantic Scholar author {author_id} via ORCID {identity.get('orcid')}")
+                author_results = await fetch_author_papers(http, author_id, identity.get('confidence', 0.8), scorer, since)
+                if author_results is not None:
+                    print(f"Found {len(author_results)} results from Semantic Scholar")
+                    return author_results
+            print("No Semantic Scholar author from ORCID DOIs, searching by name")
+        
         print(f"Searching Semantic Scholar for: {full_name}")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            search_url = "https://api.semanticscholar.org/graph/v1/author/search"
-            params = {
-                "query": full_name,
-                "limit": 3
-            }
-            
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Academic Research Bot)"
-            }
-            
-            response = await client.get(search_url, params=params, headers=headers)
+        search_url = f"{API_URL}/author/search"
+        params = {
+            "query": full_name,
+            "limit": 3
+        }
+        
+        response = await http.get(search_url, params=params, headers=HEADERS)
+        
+        if response.status_code == 200:
+            data = response.json()
+            authors = data.get('data', [])
             
-            if response.status_code == 200:
-                data = response.json()
-                authors = data.get('data', [])
+            for author in authors:
+                author_name = author.get('name', '')
+                author_id = author.get('authorId', '')
                 
-                for author in authors:
-                    author_name = author.get('name', '')
-                    author_id = author.get('authorId', '')
-                    
-                    profile_confidence = calculate_confidence_score(
-                        author_name,
-                        full_name,
-                        scraped_institution=None,
-                        target_institution=None
-                    )
-                    
-                    print(f"Found Semantic Scholar author: {author_name} - confidence: {profile_confidence:.2f}")
-                    
-                    if profile_confidence < 0.40:
-                        continue
+                profile_confidence = scorer.score(author_name)
+                
+                print(f"Found Semantic Scholar author: {author_name} - confidence: {profile_confidence:.2f}")
+                
+                if profile_confidence < 0.40:
+                    continue
+                
+                if author_id:
+                    author_results = await fetch_author_papers(http, author_id, profile_confidence, scorer, since)
                     
-                    if author_id:
-                        papers_url = f"https://api.semanticscholar.org/graph/v1/author/{author_id}/papers"
-                        papers_params = {
-                            "limit": 5,
-                            "fields": "title,authors,year,abstract,url,venue,citationCount"
-                        }
-                        
-                        papers_response = await client.get(papers_url, params=papers_params, headers=headers)
-                        
-                        if papers_response.status_code == 200:
-                            papers_data = papers_response.json()
-                            papers = papers_data.get('data', [])
-                            
-                            for paper in papers:
-                                try:
-                                    title = paper.get('title', 'No title')
-                                    abstract = paper.get('abstract', '')
-                                    year = paper.get('year', '')
-                                    url = paper.get('url', '')
-                                    venue = paper.get('venue', '')
-                                    citation_count = paper.get('citationCount', 0)
-                                    
-                                    authors_list = paper.get('authors', [])
-                                    authors_str = ', '.join([a.get('name', '') for a in authors_list])
-                                    
-                                    if profile_confidence >= 0.8:
-                                        confidence = profile_confidence
-                                    else:
-                                        confidence = calculate_confidence_score(
-                                            authors_str,
-                                            full_name,
-                                            scraped_institution=None,
-                                            target_institution=institution,
-                                            scraped_text=f"{title} {abstract} {authors_str} {venue}",
-                                            field_of_study=field_of_study
-                                        )
-                                    
-                                    results.append({
-                                        'source': 'Semantic Scholar',
-                                        'url': url or f"https://www.semanticscholar.org/paper/{paper.get('paperId', '')}",
-                                        'title': title,
-                                        'description': abstract[:500] if abstract else f"Published in {venue} ({year})",
-                                        'authors': authors_str,
-                                        'confidenceScore': confidence,
-                                        'raw_data': {
-                                            'full_authors': authors_str,
-                                            'abstract': abstract,
-                                            'venue': venue,
-                                            'year': year,
-                                            'citation_count': citation_count
-                                        }
-                                    })
-                                    
-                                except Exception as paper_error:
-                                    print(f"Error processing Semantic Scholar paper: {paper_error}")
-                                    continue
-                            
-                            if results:
-                                break
+                    # No papers under `since` means nothing new, not a different author
+                    if author_results is not None:
+                        results = author_results
+                        break
+        else:
+            print(f"Semantic Scholar search failed with status: {response.status_code}")
         
         print(f"Found {len(results)} results from Semantic Scholar")
-        
+    
     except Exception as e:
         print(f"Error scraping Semantic Scholar: {e}")
     
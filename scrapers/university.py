@@ -1,7 +1,15 @@
 from typing import Optional, List
+from http_client import ClientRegistry
 
 
-async def scrape_university_websites(first_name: str, last_name: str, institution: Optional[str] = None) -> List[dict]:
+async def scrape_university_websites(
+    first_name: str,
+    last_name: str,
+    institution: Optional[str] = None,
+    field_of_study: Optional[str] = None,
+    clients: Optional[ClientRegistry] = None,
+    since: Optional[object] = None
+) -> List[dict]:
     results = []
     full_name = f"{first_name} {last_name}"
     
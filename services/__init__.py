@@ -1,5 +1,15 @@
-from .aggregation import aggregate_teacher_data
+from .aggregation import aggregate_teacher_data, stream_teacher_data
 from .strapi import send_to_strapi
-from .strapi import get_existing_urls
+from .strapi import get_existing_urls, known_urls
+from .strapi import StrapiClient, get_strapi, set_strapi
 
-__all__ = ['aggregate_teacher_data', 'send_to_strapi', 'get_existing_urls']
+__all__ = [
+    'aggregate_teacher_data',
+    'stream_teacher_data',
+    'send_to_strapi',
+    'get_existing_urls',
+    'known_urls',
+    'StrapiClient',
+    'get_strapi',
+    'set_strapi'
+]
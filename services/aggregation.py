@@ -1,126 +1,380 @@
 import asyncio
+import bisect
+import time
 from datetime import datetime
-from rapidfuzz import fuzz
-from models import TeacherRequest, DataProposal, ScrapedData
-from scrapers import (
-    scrape_google_scholar,
-    scrape_university_websites,
-    scrape_researchgate,
-    scrape_orcid_info,
-    scrape_dblp,
-    scrape_arxiv,
-    scrape_semantic_scholar
-)
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process
+from config import AGGREGATION_DEADLINE, IDENTITY_MIN_CONFIDENCE, IDENTITY_WAIT, SOURCE_CONCURRENCY_DEFAULT
+from http_client import ClientRegistry
+from metrics import ITEMS, SOURCE_SECONDS, STAGE_SECONDS, current_source
+from tracing import current_trace_id, span
+from models import TeacherRequest, DataProposal, ScrapedData, SourceStatus, COMPLETE, TIMED_OUT, FAILED
+from scrapers import SourceSpec, enabled_sources, get_source, is_identity_marker
+
+
+MIN_CONFIDENCE_SCORE = 0.15
+
+TITLE_SIMILARITY_THRESHOLD = 0.90
+
+# fuzz.ratio >= 90 is only reachable when the shorter title is at least 9/11 of the longer one,
+# so each block of titles only has to be compared against titles of similar length.
+TITLE_LENGTH_RATIO = 0.8
+TITLE_BLOCK_SIZE = 512
+
+
+def find_similar_titles(titles: List[str]) -> List[List[int]]:
+    """
+    For every title returns the indices of earlier titles with fuzz.ratio >= 90%.
+    Titles are sorted by length and compared block-wise with process.cdist, skipping
+    pairs whose lengths alone rule out a match.
+    """
+    neighbors = [[] for _ in titles]
+    if len(titles) < 2:
+        return neighbors
+
+    order = sorted(range(len(titles)), key=lambda i: len(titles[i]))
+    lengths = [len(titles[i]) for i in order]
+    sorted_titles = [titles[i] for i in order]
+
+    for block_start in range(0, len(order), TITLE_BLOCK_SIZE):
+        block_end = min(block_start + TITLE_BLOCK_SIZE, len(order))
+        col_start = bisect.bisect_left(lengths, lengths[block_start] * TITLE_LENGTH_RATIO)
+        col_end = bisect.bisect_right(lengths, lengths[block_end - 1] / TITLE_LENGTH_RATIO)
+
+        scores = process.cdist(
+            sorted_titles[block_start:block_end],
+            sorted_titles[col_start:col_end],
+            scorer=fuzz.ratio,
+            score_cutoff=TITLE_SIMILARITY_THRESHOLD * 100 - 0.1,
+            dtype=np.float64,
+            workers=-1
+        )
+
+        rows, cols = np.nonzero(scores / 100.0 >= TITLE_SIMILARITY_THRESHOLD)
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            i = order[block_start + row]
+            j = order[col_start + col]
+            if j < i:
+                neighbors[i].append(j)
+
+    return neighbors
 
 
 def deduplicate_papers(papers: list) -> list:
     """
     Deduplicate papers based on DOI (exact match) or title similarity.
     Keeps the paper with highest confidence score.
+
+    A title is matched against the earliest-inserted similar title still kept,
+    and a replacement moves to the end of the output, as with a sequential scan.
     """
+    deduplicated = []
     seen_dois = {}
+    
+    untitled = [
+        i for i, paper in enumerate(papers)
+        if not paper.get('raw_data', {}).get('doi')
+    ]
+    titles = [papers[i].get('title', '').lower().strip() for i in untitled]
+    neighbors = find_similar_titles(titles)
+    title_of = dict(zip(untitled, range(len(untitled))))
+    
+    # title -> (title index, insertion position, slot in deduplicated)
     seen_titles = {}
-    deduplicated = []
+    position = 0
     
-    for paper in papers:
+    for i, paper in enumerate(papers):
         doi = paper.get('raw_data', {}).get('doi')
-        title = paper.get('title', '').lower().strip()
         
         if doi and doi in seen_dois:
-            existing = seen_dois[doi]
-            if paper.get('confidenceScore', 0) > existing.get('confidenceScore', 0):
-                deduplicated.remove(existing)
-                seen_dois[doi] = paper
+            slot = seen_dois[doi]
+            if paper.get('confidenceScore', 0) > deduplicated[slot].get('confidenceScore', 0):
+                deduplicated[slot] = None
+                seen_dois[doi] = len(deduplicated)
                 deduplicated.append(paper)
         elif doi:
-            seen_dois[doi] = paper
+            seen_dois[doi] = len(deduplicated)
             deduplicated.append(paper)
         else:
-            is_duplicate = False
-            for seen_title, seen_paper in list(seen_titles.items()):
-                similarity = fuzz.ratio(title, seen_title) / 100.0
-                if similarity >= 0.90:
-                    is_duplicate = True
-                    if paper.get('confidenceScore', 0) > seen_paper.get('confidenceScore', 0):
-                        deduplicated.remove(seen_paper)
-                        del seen_titles[seen_title]
-                        seen_titles[title] = paper
-                        deduplicated.append(paper)
-                    break
+            t = title_of[i]
+            title = titles[t]
             
-            if not is_duplicate:
-                seen_titles[title] = paper
+            match = None
+            for j in neighbors[t]:
+                entry = seen_titles.get(titles[j])
+                if entry and entry[0] == j and (match is None or entry[1] < match[1]):
+                    match = entry
+            
+            if match is None:
+                seen_titles[title] = (t, position, len(deduplicated))
+                position += 1
+                deduplicated.append(paper)
+                continue
+            
+            seen_paper = deduplicated[match[2]]
+            if paper.get('confidenceScore', 0) > seen_paper.get('confidenceScore', 0):
+                deduplicated[match[2]] = None
+                del seen_titles[titles[match[0]]]
+                
+                existing = seen_titles.get(title)
+                if existing:
+                    seen_titles[title] = (t, existing[1], len(deduplicated))
+                else:
+                    seen_titles[title] = (t, position, len(deduplicated))
+                    position += 1
                 deduplicated.append(paper)
     
-    return deduplicated
+    return [paper for paper in deduplicated if paper is not None]
 
 
-async def aggregate_teacher_data(teacher: TeacherRequest) -> DataProposal:
-    print(f"Starting aggregation for {teacher.first_name} {teacher.last_name}")
+_source_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def get_source_semaphore(source: str) -> asyncio.Semaphore:
+    """Shared per-source limit, so concurrent teachers queue for a source instead of flooding it."""
+    semaphore = _source_semaphores.get(source)
+    if semaphore is None:
+        spec = get_source(source)
+        semaphore = asyncio.Semaphore(spec.concurrency if spec else SOURCE_CONCURRENCY_DEFAULT)
+        _source_semaphores[source] = semaphore
+    return semaphore
+
+
+async def run_limited(source: str, coro):
+    # Runs in the source's own task, so the label does not leak to other sources
+    current_source.set(source)
+    with span(f"scrape {source}", source=source) as source_span:
+        async with get_source_semaphore(source):
+            result = await coro
+        source_span.set_attribute('items', len(scraped_items(result)) if isinstance(result, list) else 0)
+        return result
+
+
+async def resolve_identity(spec: SourceSpec, coro: Awaitable[List[dict]], identity: asyncio.Future) -> List[dict]:
+    """Runs an identity resolver and publishes what it resolved; failures and cancellation publish None."""
+    try:
+        items = await coro
+    except BaseException:
+        if not identity.done():
+            identity.set_result(None)
+        raise
     
-    tasks = [
-        scrape_google_scholar(
-            teacher.first_name,
-            teacher.last_name,
-            teacher.current_institution,
-            teacher.field_of_study
-        ),
-        scrape_university_websites(
-            teacher.first_name,
-            teacher.last_name,
-            teacher.current_institution
-        ),
-        scrape_researchgate(
-            teacher.first_name,
-            teacher.last_name,
-            teacher.current_institution,
-            teacher.field_of_study
-        ),
-        scrape_orcid_info(
-            teacher.first_name,
-            teacher.last_name,
-            teacher.current_institution,
-            teacher.field_of_study
-        ),
-        scrape_dblp(
-            teacher.first_name,
-            teacher.last_name,
-            teacher.current_institution,
-            teacher.field_of_study
-        ),
-        scrape_arxiv(
-            teacher.first_name,
-            teacher.last_name,
-            teacher.current_institution,
-            teacher.field_of_study
-        ),
-        scrape_semantic_scholar(
+    resolved = spec.identity(items)
+    if resolved:
+        print(f"{spec.name} resolved an identity ({', '.join(sorted(resolved))}) for dependent sources")
+    identity.set_result(resolved)
+    return items
+
+
+async def wait_for_identity(sources: Tuple[str, ...], identities: Dict[str, asyncio.Future]) -> Optional[Dict[str, Any]]:
+    """Merged identifiers of the given resolvers, giving up on those not done within IDENTITY_WAIT."""
+    futures = [identities[source] for source in sources if source in identities]
+    if not futures:
+        return None
+    
+    done, _ = await asyncio.wait(futures, timeout=IDENTITY_WAIT)
+    identity: Dict[str, Any] = {}
+    for future in done:
+        identity.update(future.result() or {})
+    return identity or None
+
+
+async def run_dependent(
+    spec: SourceSpec,
+    scrape: Callable[[Optional[Dict[str, Any]]], Awaitable[List[dict]]],
+    identities: Dict[str, asyncio.Future]
+) -> List[dict]:
+    # Waits outside the source semaphore, so other teachers can use the source meanwhile
+    with span(f"await identity {spec.name}", depends_on=','.join(spec.depends_on)) as wait_span:
+        identity = await wait_for_identity(spec.depends_on, identities)
+        wait_span.set_attribute('resolved', identity is not None)
+    return await run_limited(spec.name, scrape(identity))
+
+
+def build_source_tasks(
+    teacher: TeacherRequest,
+    clients: Optional[ClientRegistry] = None,
+    watermarks: Optional[Dict[str, Any]] = None,
+    identities: Optional[Dict[str, Any]] = None
+) -> Dict[str, Awaitable[List[dict]]]:
+    """
+    One limited scraper coroutine per enabled source, in registry order (the order results
+    are merged in). Disabled sources are never called, so they cost no network I/O.
+    Incremental sources get their previous watermark as `since`.
+    
+    Sources form a small dependency graph: identity resolvers (ORCID) and independent sources
+    start at once, while sources that depend on a resolver wait for it and receive its identifiers
+    as `identity`, so they can query by exact ID. Without an identity they search by name as before.
+    
+    `identities` are the member's cached identifiers (IdentityStore.known). Sources that take
+    an identity get them as well; a dependent whose own identifier is cached starts at once.
+    """
+    watermarks = watermarks or {}
+    known = identities or {}
+    specs = enabled_sources()
+    loop = asyncio.get_running_loop()
+    resolvers = {name for spec in specs for name in spec.depends_on}
+    futures = {spec.name: loop.create_future() for spec in specs if spec.identity and spec.name in resolvers}
+    
+    def scrape(spec: SourceSpec, identity: Optional[Dict[str, Any]] = None) -> Awaitable[List[dict]]:
+        kwargs = {'identity': identity} if spec.identity_key or spec.depends_on else {}
+        return spec.scrape(
             teacher.first_name,
             teacher.last_name,
             teacher.current_institution,
-            teacher.field_of_study
+            teacher.field_of_study,
+            clients=clients,
+            since=watermarks.get(spec.name) if spec.watermark else None,
+            **kwargs
         )
-    ]
     
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    tasks = {}
+    for spec in specs:
+        if spec.depends_on and not known.get(spec.identity_key):
+            tasks[spec.name] = run_dependent(
+                spec,
+                lambda identity, spec=spec: scrape(spec, {**known, **(identity or {})} or None),
+                futures
+            )
+        elif spec.name in futures:
+            tasks[spec.name] = run_limited(spec.name, resolve_identity(spec, scrape(spec, known or None), futures[spec.name]))
+        else:
+            tasks[spec.name] = run_limited(spec.name, scrape(spec, known or None))
+    return tasks
+
+
+def next_watermarks(
+    results: Dict[str, list],
+    sources: Dict[str, SourceStatus],
+    previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Watermarks that moved, for incremental sources that ran to completion."""
+    previous = previous or {}
+    watermarks = {}
+    for source, status in sources.items():
+        spec = get_source(source)
+        if not spec or not spec.watermark or status.status != COMPLETE:
+            continue
+        watermark = spec.watermark(results.get(source, []), previous.get(source))
+        if watermark is not None and watermark != previous.get(source):
+            watermarks[source] = watermark
+    return watermarks
+
+
+def next_identities(
+    results: Dict[str, list],
+    sources: Dict[str, SourceStatus],
+    known: Optional[Dict[str, Any]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Identifiers that completed sources resolved with at least IDENTITY_MIN_CONFIDENCE and that
+    differ from the cached ones, as {identity_key: {'value', 'confidence'}}.
+    """
+    known = known or {}
+    identities = {}
+    for source, status in sources.items():
+        spec = get_source(source)
+        if not spec or not spec.identity or not spec.identity_key or status.status != COMPLETE:
+            continue
+        resolved = spec.identity(results.get(source, []))
+        if not resolved or resolved.get('confidence', 0) < IDENTITY_MIN_CONFIDENCE:
+            continue
+        value = resolved.get(spec.identity_key)
+        if value and value != known.get(spec.identity_key):
+            identities[spec.identity_key] = {'value': value, 'confidence': resolved['confidence']}
+    return identities
+
+
+def scraped_items(items: List[dict]) -> List[dict]:
+    """A source's results without identity markers, which only feed identity resolution and watermarks."""
+    return [data for data in items if not is_identity_marker(data)]
+
+
+def filter_confident(items: List[dict]) -> List[dict]:
+    return [
+        data for data in scraped_items(items)
+        if data.get('confidenceScore', 0) >= MIN_CONFIDENCE_SCORE
+    ]
+
+
+async def run_sources(
+    coros: Dict[str, Awaitable[List[dict]]],
+    deadline: Optional[float] = None
+) -> AsyncIterator[Tuple[str, SourceStatus, List[dict]]]:
+    """
+    Runs all sources concurrently and yields (source, status, items) as each one finishes.
+    When the deadline (seconds) expires the remaining sources are cancelled and yielded as timed out.
+    """
+    started = time.perf_counter()
+    pending = {asyncio.ensure_future(coro): source for source, coro in coros.items()}
     
+    try:
+        while pending:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0.0, deadline - (time.perf_counter() - started))
+            
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            elapsed = round(time.perf_counter() - started, 3)
+            
+            if not done:
+                for task, source in list(pending.items()):
+                    task.cancel()
+                    del pending[task]
+                    print(f"{source} timed out after {elapsed}s")
+                    SOURCE_SECONDS.labels(source, TIMED_OUT).observe(elapsed)
+                    yield source, SourceStatus(status=TIMED_OUT, elapsed=elapsed), []
+                break
+            
+            for task in done:
+                source = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"{source} failed: {e}")
+                    SOURCE_SECONDS.labels(source, FAILED).observe(elapsed)
+                    yield source, SourceStatus(status=FAILED, elapsed=elapsed, error=str(e)), []
+                    continue
+                
+                items = result if isinstance(result, list) else []
+                SOURCE_SECONDS.labels(source, COMPLETE).observe(elapsed)
+                yield source, SourceStatus(status=COMPLETE, elapsed=elapsed, items=len(scraped_items(items))), items
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def build_proposal(
+    teacher: TeacherRequest,
+    results: list,
+    sources: Optional[Dict[str, SourceStatus]] = None,
+    watermarks: Optional[Dict[str, Any]] = None,
+    identities: Optional[Dict[str, Any]] = None
+) -> DataProposal:
+    """Merges per-source results (in source order), filters, deduplicates and sorts them into a proposal."""
     all_scraped_data = []
     for result in results:
         if isinstance(result, list):
-            all_scraped_data.extend(result)
+            all_scraped_data.extend(scraped_items(result))
     
     print(f"Total scraped items before filtering: {len(all_scraped_data)}")
     for item in all_scraped_data:
         print(f"  - {item.get('source')}: confidence={item.get('confidenceScore', 0)}")
     
-    filtered_data = [
-        data for data in all_scraped_data 
-        if data.get('confidenceScore', 0) >= 0.15
-    ]
+    filtered_data = filter_confident(all_scraped_data)
     
-    print(f"Total items after filtering (>= 0.15): {len(filtered_data)}")
+    print(f"Total items after filtering (>= {MIN_CONFIDENCE_SCORE}): {len(filtered_data)}")
     
-    deduplicated_data = deduplicate_papers(filtered_data)
+    started = time.perf_counter()
+    with span('deduplicate', items=len(filtered_data)) as dedup_span:
+        deduplicated_data = deduplicate_papers(filtered_data)
+        dedup_span.set_attribute('kept', len(deduplicated_data))
+    STAGE_SECONDS.labels('dedup').observe(time.perf_counter() - started)
+    
+    for stage, items in (('scraped', all_scraped_data), ('confident', filtered_data), ('kept', deduplicated_data)):
+        for item in items:
+            ITEMS.labels(item.get('source', 'unknown'), stage).inc()
     
     print(f"Total items after deduplication: {len(deduplicated_data)}")
     
@@ -130,7 +384,104 @@ async def aggregate_teacher_data(teacher: TeacherRequest) -> DataProposal:
     proposal = DataProposal(
         member=teacher.member_document_id or teacher.teacher_id,
         scrapedData=scraped_data_list,
-        createdAt=datetime.now()
+        createdAt=datetime.now(),
+        sources=sources or {},
+        watermarks=watermarks or {},
+        identities=identities or {}
     )
     
     return proposal
+
+
+def resolve_deadline(teacher: TeacherRequest, deadline: Optional[float] = None) -> Optional[float]:
+    """Explicit argument first, then the request's own deadline, then AGGREGATION_DEADLINE (0 disables it)."""
+    for value in (deadline, teacher.deadline, AGGREGATION_DEADLINE):
+        if value is not None:
+            return value if value > 0 else None
+    return None
+
+
+async def aggregate_teacher_data(
+    teacher: TeacherRequest,
+    clients: Optional[ClientRegistry] = None,
+    deadline: Optional[float] = None,
+    watermarks: Optional[Dict[str, Any]] = None,
+    identities: Optional[Dict[str, Any]] = None
+) -> DataProposal:
+    """
+    Scrapes all sources for a teacher and returns the deduplicated proposal.
+    Sources still running at the deadline are cancelled; the proposal then holds what was
+    gathered so far and DataProposal.sources says which sources completed, timed out or failed.
+    With `watermarks` only newer material is fetched, and DataProposal.watermarks holds the
+    advanced ones, for the caller to store once the proposal has been delivered.
+    With cached `identities` the name searches are skipped; DataProposal.identities holds
+    newly resolved identifiers confident enough to be cached.
+    """
+    print(f"Starting aggregation for {teacher.first_name} {teacher.last_name}")
+    
+    with span('aggregate_teacher_data', teacher=f"{teacher.first_name} {teacher.last_name}"):
+        coros = build_source_tasks(teacher, clients, watermarks, identities)
+        results: Dict[str, list] = {}
+        sources: Dict[str, SourceStatus] = {}
+        
+        async for source, status, items in run_sources(coros, resolve_deadline(teacher, deadline)):
+            results[source] = items
+            sources[source] = status
+        
+        return build_proposal(
+            teacher,
+            [results[source] for source in coros],
+            {source: sources[source] for source in coros},
+            next_watermarks(results, sources, watermarks),
+            next_identities(results, sources, identities)
+        )
+
+
+async def stream_teacher_data(
+    teacher: TeacherRequest,
+    clients: Optional[ClientRegistry] = None,
+    deadline: Optional[float] = None,
+    watermarks: Optional[Dict[str, Any]] = None,
+    identities: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[dict]:
+    """
+    Yields a 'source' event with the scored items of each source (under 'results'; 'items' is
+    the SourceStatus count, as elsewhere) as soon as it finishes,
+    then a 'summary' event with the same deduplicated proposal aggregate_teacher_data returns.
+    Sources still running when the consumer goes away or the deadline expires are cancelled.
+    """
+    print(f"Starting streaming aggregation for {teacher.first_name} {teacher.last_name}")
+    
+    started = time.perf_counter()
+    coros = build_source_tasks(teacher, clients, watermarks, identities)
+    results: Dict[str, list] = {}
+    sources: Dict[str, SourceStatus] = {}
+    
+    async for source, status, result in run_sources(coros, resolve_deadline(teacher, deadline)):
+        results[source] = result
+        sources[source] = status
+        
+        items = [ScrapedData(**data).model_dump() for data in filter_confident(result)]
+        items.sort(key=lambda item: item['confidenceScore'], reverse=True)
+        yield {
+            'event': 'source',
+            'source': source,
+            **status.model_dump(),
+            'results': items
+        }
+    
+    proposal = build_proposal(
+        teacher,
+        [results[source] for source in coros],
+        {source: sources[source] for source in coros}
+    )
+    yield {
+        'event': 'summary',
+        'elapsed': round(time.perf_counter() - started, 3),
+        'member': proposal.member,
+        'total': len(proposal.scrapedData),
+        'sources': {source: status.status for source, status in proposal.sources.items()},
+        'scrapedData': [data.model_dump() for data in proposal.scrapedData],
+        'createdAt': proposal.createdAt.isoformat(),
+        'trace_id': current_trace_id()
+    }
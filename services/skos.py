@@ -1,6 +1,12 @@
-import httpx
+from http_client import get_registry
 from bs4 import BeautifulSoup
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+from config import SKOS_DIRECTORY_TTL
+from parsing import run_parse
+import asyncio
+import json
+import time
+import unicodedata
 import urllib.parse
 import logging
 
@@ -10,19 +16,108 @@ logger = logging.getLogger(__name__)
 DEPARTMENT_URL = "https://skos.agh.edu.pl/jednostka/akademia-gorniczo-hutnicza-im-stanislawa-staszica-w-krakowie/wydzial-inzynierii-metali-i-informatyki-przemyslowej/katedra-informatyki-stosowanej-i-modelowania-366.html"
 
 async def fetch_department_page() -> Optional[str]:
-    """Fetches the department listing page HTML."""
+    """
+    Fetches the department listing page HTML. The parsed directory has its own
+    SKOS_DIRECTORY_TTL, so the fetch bypasses the HTTP response cache (a week for SKOS).
+    """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(DEPARTMENT_URL)
-            if response.status_code == 200:
-                return response.text
-            else:
-                logger.error(f"Failed to fetch department page: {response.status_code}")
-                return None
+        http = get_registry()
+        response = await http.get(DEPARTMENT_URL, use_cache=False)
+        if response.status_code == 200:
+            return response.text
+        else:
+            logger.error(f"Failed to fetch department page: {response.status_code}")
+            return None
     except Exception as e:
         logger.error(f"Exception fetching department page: {e}")
         return None
 
+def normalize_name(value: str) -> str:
+    """Lowercases and strips diacritics so 'Łukasz Kraśnicki' and 'lukasz krasnicki' compare equal."""
+    value = value.replace('ł', 'l').replace('Ł', 'L')
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+def parse_department_members(html: str) -> List[Tuple[str, str]]:
+    """Extracts (normalized link text, absolute profile URL) pairs for every member link."""
+    soup = BeautifulSoup(html, 'lxml')
+    members = []
+
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if '/osoba/' not in href:
+            continue
+        text = normalize_name(link.get_text())
+        members.append((text, urllib.parse.urljoin("https://skos.agh.edu.pl", href)))
+
+    return members
+
+class DepartmentDirectory:
+    """
+    Member links from the department listing, parsed once.
+    Entries are indexed by (last name, first name) as they appear in the "Lastname Firstname, degrees..." format.
+    """
+
+    def __init__(self, members: List[Tuple[str, str]]):
+        self.members = members
+        self.index: Dict[Tuple[str, str], str] = {}
+
+        for text, url in members:
+            name_tokens = text.split(',')[0].split()
+            if len(name_tokens) < 2:
+                continue
+            last = name_tokens[0]
+            for given in name_tokens[1:]:
+                self.index.setdefault((last, given), url)
+
+    @classmethod
+    def from_html(cls, html: str) -> "DepartmentDirectory":
+        return cls(parse_department_members(html))
+
+    def find(self, first_name: str, last_name: str) -> Optional[str]:
+        target_last = normalize_name(last_name)
+        target_first = normalize_name(first_name)
+
+        first_tokens = target_first.split()
+        if first_tokens:
+            url = self.index.get((target_last, first_tokens[0]))
+            if url:
+                return url
+
+        for text, url in self.members:
+            if target_last in text and target_first in text:
+                return url
+
+        return None
+
+_directory: Optional[DepartmentDirectory] = None
+_directory_expires_at = 0.0
+_directory_lock = asyncio.Lock()
+
+async def get_department_directory() -> Optional[DepartmentDirectory]:
+    """
+    Returns the parsed department directory, fetching and parsing the page only
+    when the cached copy is older than SKOS_DIRECTORY_TTL.
+    """
+    global _directory, _directory_expires_at
+
+    if _directory is not None and time.monotonic() < _directory_expires_at:
+        return _directory
+
+    async with _directory_lock:
+        if _directory is not None and time.monotonic() < _directory_expires_at:
+            return _directory
+
+        html = await fetch_department_page()
+        if not html:
+            return _directory
+
+        _directory = DepartmentDirectory(await run_parse(parse_department_members, html))
+        _directory_expires_at = time.monotonic() + SKOS_DIRECTORY_TTL
+        logger.info(f"Indexed {len(_directory.members)} SKOS department members")
+
+    return _directory
+
 def find_member_link(html: str, first_name: str, last_name: str) -> Optional[str]:
     """
     Parses the department page HTML to find the link to a specific member's profile.
@@ -32,30 +127,11 @@ def find_member_link(html: str, first_name: str, last_name: str) -> Optional[str
     if not html:
         return None
 
-    soup = BeautifulSoup(html, 'lxml')
-    
-    target_last = last_name.lower()
-    target_first = first_name.lower()
-    
-    links = soup.find_all('a', href=True)
-    
-    for link in links:
-        href = link['href']
-        text = link.get_text().strip()
-        
-        if '/osoba/' not in href:
-            continue
-            
-        text_lower = text.lower()
-        
-        if target_last in text_lower and target_first in text_lower:
-            return urllib.parse.urljoin("https://skos.agh.edu.pl", href)
-            
-    return None
+    return DepartmentDirectory.from_html(html).find(first_name, last_name)
 
-async def scrape_member_profile(url: str) -> Dict[str, Optional[str]]:
+def parse_member_profile(html: str, url: str) -> Dict[str, Optional[str]]:
     """
-    Scrapes a member's profile page for details.
+    Parses a member's profile page.
     Uses the embedded __NEXT_DATA__ JSON for reliability.
     Returns a dict with: title, room, phone, email, url.
     """
@@ -67,87 +143,116 @@ async def scrape_member_profile(url: str) -> Dict[str, Optional[str]]:
         "url": url
     }
     
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url)
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch profile page: {response.status_code}")
-                return data
-            html = response.text
+    soup = BeautifulSoup(html, 'lxml')
+    next_data_tag = soup.find('script', id='__NEXT_DATA__')
+    
+    if next_data_tag:
+        try:
+            next_data = json.loads(next_data_tag.string)
+            page_props = next_data.get('props', {}).get('pageProps', {})
+            user_data = page_props.get('data', {})
             
-        soup = BeautifulSoup(html, 'lxml')
-        next_data_tag = soup.find('script', id='__NEXT_DATA__')
-        
-        if next_data_tag:
-            import json
-            try:
-                next_data = json.loads(next_data_tag.string)
-                page_props = next_data.get('props', {}).get('pageProps', {})
-                user_data = page_props.get('data', {})
+            workplaces = user_data.get('workplaces', [])
+            if workplaces:
+                wp = workplaces[0]
                 
-                workplaces = user_data.get('workplaces', [])
-                if workplaces:
-                    wp = workplaces[0]
+                office = wp.get('office', {})
+                if office:
+                    parts = []
+                    if office.get('building'): 
+                        bldg = office['building'].split(',')[0].strip()
+                        parts.append(bldg)
                     
-                    office = wp.get('office', {})
-                    if office:
-                        parts = []
-                        if office.get('building'): 
-                            bldg = office['building'].split(',')[0].strip()
-                            parts.append(bldg)
+                    if office.get('room'):
+                        room_val = office['room']
+                        room_val = room_val.lower().replace("pok.", "").replace("pok", "").strip()
+                        parts.append(room_val)
                         
-                        if office.get('room'):
-                            room_val = office['room']
-                            room_val = room_val.lower().replace("pok.", "").replace("pok", "").strip()
-                            parts.append(room_val)
-                            
-                        data['room'] = " ".join(parts)
-
-                    phones = wp.get('phoneDetails', [])
-                    if phones:
-                        ph = phones[0]
-                        cc = ph.get('countryCode', '')
-                        num = ph.get('phoneNumber', '')
-                        if cc and num:
-                            data['phone'] = f"+{cc} {num}"
-                        elif num:
-                            data['phone'] = num
-
-                emails = user_data.get('emails', [])
-                if emails:
-                    reversed_email_html = emails[0]
-                    email_html = reversed_email_html[::-1]
-                    email_soup = BeautifulSoup(email_html, 'lxml')
-                    if email_soup.find('a'):
-                        raw_email = email_soup.find('a').get_text().strip()
-                        data['email'] = raw_email.replace('#', '@')
-                
-            except Exception as e:
-                logger.error(f"Error parsing __NEXT_DATA__: {e}")
-                
-        else:
-             logger.warning("__NEXT_DATA__ tag not found, fallback to HTML parsing skipped.")
+                    data['room'] = " ".join(parts)
+
+                phones = wp.get('phoneDetails', [])
+                if phones:
+                    ph = phones[0]
+                    cc = ph.get('countryCode', '')
+                    num = ph.get('phoneNumber', '')
+                    if cc and num:
+                        data['phone'] = f"+{cc} {num}"
+                    elif num:
+                        data['phone'] = num
+
+            emails = user_data.get('emails', [])
+            if emails:
+                reversed_email_html = emails[0]
+                email_html = reversed_email_html[::-1]
+                email_soup = BeautifulSoup(email_html, 'lxml')
+                if email_soup.find('a'):
+                    raw_email = email_soup.find('a').get_text().strip()
+                    data['email'] = raw_email.replace('#', '@')
+            
+        except Exception as e:
+            logger.error(f"Error parsing __NEXT_DATA__: {e}")
+            
+    else:
+         logger.warning("__NEXT_DATA__ tag not found, fallback to HTML parsing skipped.")
+        
+    return data
+
+async def fetch_member_profile(url: str) -> Optional[Dict[str, Optional[str]]]:
+    """The parsed profile page, or None when it could not be fetched."""
+    try:
+        http = get_registry()
+        response = await http.get(url)
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch profile page: {response.status_code}")
+            return None
+        
+        return await run_parse(parse_member_profile, response.text, url)
         
     except Exception as e:
         logger.error(f"Exception scraping profile: {e}")
-        
+        return None
+
+async def scrape_member_profile(url: str) -> Dict[str, Optional[str]]:
+    """
+    Scrapes a member's profile page for details.
+    Fetching happens here, parsing in parse_member_profile off the event loop.
+    Returns a dict with: title, room, phone, email, url.
+    """
+    data = await fetch_member_profile(url)
+    if data is None:
+        return {
+            "title": None,
+            "room": None,
+            "phone": None,
+            "email": None,
+            "url": url
+        }
     return data
 
-async def scrape_skos_data(first_name: str, last_name: str) -> list[dict]:
+async def scrape_skos_data(first_name: str, last_name: str, profile_url: Optional[str] = None) -> list[dict]:
     """
     Scraper interface for aggregation service.
     Returns a list containing a single ScrapedData-compatible dict if found.
+    A known `profile_url` (from the identity cache) skips the department directory lookup;
+    when it can no longer be fetched the member is looked up in the directory instead.
     """
     try:
-        html = await fetch_department_page()
-        if not html:
-            return []
+        profile_data = None
+        if profile_url:
+            profile_data = await fetch_member_profile(profile_url)
+            if profile_data is None:
+                logger.warning(f"Known SKOS profile {profile_url} could not be fetched, looking it up in the directory")
+        
+        if profile_data is None:
+            directory = await get_department_directory()
+            if not directory:
+                return []
             
-        profile_url = find_member_link(html, first_name, last_name)
-        if not profile_url:
-            return []
+            profile_url = directory.find(first_name, last_name)
+            if not profile_url:
+                return []
             
-        profile_data = await scrape_member_profile(profile_url)
+            profile_data = await scrape_member_profile(profile_url)
         
         if not profile_data.get('url'):
             return []
@@ -1,78 +1,377 @@
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import random
+import time
 import httpx
-from config import STRAPI_URL, STRAPI_API_TOKEN
+from http_client import IDEMPOTENT_METHODS, RETRY_STATUSES, ClientRegistry, get_registry
+from metrics import STRAPI_REQUEST_SECONDS
+from tracing import CLIENT, span
+from proposal_index import ProposalIndex
+from config import (
+    STRAPI_URL,
+    STRAPI_API_TOKEN,
+    STRAPI_PAGE_SIZE,
+    STRAPI_PAGE_CONCURRENCY,
+    STRAPI_URL_CACHE_TTL,
+    STRAPI_URL_CACHE_MAX_MEMBERS,
+    STRAPI_MAX_RETRIES,
+    STRAPI_RETRY_BACKOFF,
+    STRAPI_BULK_CONCURRENCY
+)
 
+TRANSIENT_STATUSES = (500, 502, 504)
 
-async def send_to_strapi(proposal: dict) -> Optional[dict]:
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            headers = {
-                'x-api-secret-key': f'{STRAPI_API_TOKEN}',
-                'Content-Type': 'application/json'
-            }
-            
-            strapi_data = {
-                "data": {
-                    "member": proposal.get('member'),
-                    "scrapedData": proposal['scrapedData']
-                }
+
+def is_transient(method: str, status: int) -> bool:
+    """ClientRegistry.send already retries 429/503 for idempotent methods; writes get them back to retry here."""
+    return status in TRANSIENT_STATUSES or (status in RETRY_STATUSES and method not in IDEMPOTENT_METHODS)
+
+# Failures where the request never reached Strapi, so it cannot have been applied
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class MemberUrlCache:
+    """
+    URLs already proposed for each member, kept for STRAPI_URL_CACHE_TTL seconds and bounded
+    to the most recently used members. Successful sends add their URLs in place.
+    """
+
+    def __init__(self, ttl: float = STRAPI_URL_CACHE_TTL, max_members: int = STRAPI_URL_CACHE_MAX_MEMBERS):
+        self.ttl = ttl
+        self.max_members = max_members
+        self._entries: OrderedDict[str, Tuple[float, set[str]]] = OrderedDict()
+
+    def get(self, member: str) -> Optional[set[str]]:
+        entry = self._entries.get(member)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl:
+            del self._entries[member]
+            return None
+        self._entries.move_to_end(member)
+        return entry[1]
+
+    def put(self, member: str, urls: set[str]):
+        self._entries[member] = (time.monotonic(), urls)
+        self._entries.move_to_end(member)
+        while len(self._entries) > self.max_members:
+            self._entries.popitem(last=False)
+
+    def add(self, member: str, urls: Iterable[str]):
+        entry = self._entries.get(member)
+        if entry is not None:
+            entry[1].update(urls)
+
+    def invalidate(self, member: Optional[str] = None):
+        if member is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(member, None)
+
+
+member_urls = MemberUrlCache()
+
+
+def parse_proposal_urls(content: bytes) -> Tuple[List[str], int]:
+    """URLs of one page of data-proposals and the total page count."""
+    body = json.loads(content)
+    urls = [
+        url_val
+        for proposal in body.get('data') or []
+        for item in proposal.get('scrapedData') or []
+        if (url_val := item.get('url'))
+    ]
+    page_count = body.get('meta', {}).get('pagination', {}).get('pageCount', 1)
+    return urls, page_count
+
+
+def idempotency_key(proposal: dict) -> str:
+    """Stable key for a proposal: the same member and URLs always produce the same key."""
+    urls = sorted(item.get('url', '') for item in proposal.get('scrapedData', []))
+    digest = hashlib.sha256(json.dumps([proposal.get('member'), urls]).encode())
+    return digest.hexdigest()
+
+
+class StrapiClient:
+    """
+    Strapi REST calls over the shared pooled ClientRegistry. Transient failures (connection
+    errors, timeouts, 500/502/504, and 429/503 on writes) are retried with full-jitter
+    exponential backoff.
+    Proposal creation carries an Idempotency-Key, and when an attempt may have reached
+    Strapi the member's proposals are re-read before retrying so a retry cannot duplicate it.
+    """
+
+    def __init__(
+        self,
+        clients: Optional[ClientRegistry] = None,
+        base_url: str = STRAPI_URL,
+        token: str = STRAPI_API_TOKEN,
+        max_retries: int = STRAPI_MAX_RETRIES,
+        backoff: float = STRAPI_RETRY_BACKOFF,
+        bulk_concurrency: int = STRAPI_BULK_CONCURRENCY,
+        index: Optional[ProposalIndex] = None
+    ):
+        self._clients = clients
+        self.index = index
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bulk_concurrency = bulk_concurrency
+        self.headers = {
+            'x-api-secret-key': f'{token}',
+            'Content-Type': 'application/json'
+        }
+
+    @property
+    def http(self) -> ClientRegistry:
+        return self._clients or get_registry()
+
+    async def _pause(self, attempt: int):
+        await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        idempotency_key: Optional[str] = None,
+        already_applied=None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Sends a request, retrying transient failures. `already_applied` is awaited before
+        a retry that follows an ambiguous failure; if it returns True the request is not
+        resent and a synthetic 200 response is returned.
+        """
+        started = time.perf_counter()
+        endpoint = '/'.join(path.split('/')[:3])
+        status = 'error'
+        try:
+            with span(f"strapi {method} {endpoint}", CLIENT, **{'http.method': method, 'url.path': path}) as strapi_span:
+                response = await self._request(method, path, idempotency_key, already_applied, **kwargs)
+                strapi_span.set_attribute('http.status_code', response.status_code)
+            status = str(response.status_code)
+            return response
+        finally:
+            STRAPI_REQUEST_SECONDS.labels(method, endpoint, status).observe(time.perf_counter() - started)
+
+    async def _request(self, method: str, path: str, idempotency_key, already_applied, **kwargs) -> httpx.Response:
+        headers = dict(self.headers)
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(self.max_retries + 1):
+            ambiguous = False
+            try:
+                response = await self.http.request(method, url, headers=headers, **kwargs)
+                if not is_transient(method, response.status_code) or attempt == self.max_retries:
+                    return response
+                print(f"Strapi {method} {path} returned {response.status_code}, retrying")
+                # A 429 is rejected before anything is applied
+                ambiguous = response.status_code != 429
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Strapi {method} {path} failed ({type(e).__name__}), retrying")
+                ambiguous = not isinstance(e, UNSENT_ERRORS)
+
+            await self._pause(attempt)
+
+            if ambiguous and already_applied and await already_applied():
+                print(f"Strapi {method} {path} was applied before the failure, not resending")
+                return httpx.Response(
+                    200,
+                    json={"data": {}, "meta": {"alreadyApplied": True}},
+                    request=httpx.Request(method, url)
+                )
+
+        return response
+
+    async def create_proposal(self, proposal: dict) -> Optional[dict]:
+        member = proposal.get('member')
+        urls = {item['url'] for item in proposal['scrapedData'] if item.get('url')}
+        strapi_data = {
+            "data": {
+                "member": member,
+                "scrapedData": proposal['scrapedData']
             }
+        }
+
+        async def already_applied() -> bool:
+            if not urls or not isinstance(member, str):
+                return False
+            member_urls.invalidate(member)
+            return urls <= await self.get_existing_urls(member)
 
-            response = await client.post(
-                f"{STRAPI_URL}/api/data-proposals",
-                json=strapi_data,
-                headers=headers
+        try:
+            response = await self.request(
+                "POST",
+                "/api/data-proposals",
+                idempotency_key=idempotency_key(proposal),
+                already_applied=already_applied,
+                json=strapi_data
             )
-            
+
             if response.status_code in [200, 201]:
+                member_urls.add(member, urls)
+                if self.index and isinstance(member, str):
+                    await self.index.record(member, urls)
                 return response.json()
             else:
                 print(f"Error sending to Strapi: {response.status_code} - {response.text}")
                 return None
-                
-    except Exception as e:
-        print(f"Exception sending to Strapi: {e}")
-        return None
 
+        except Exception as e:
+            print(f"Exception sending to Strapi: {e}")
+            return None
 
-async def get_existing_urls(member_document_id: str) -> set[str]:
-    if not member_document_id or not isinstance(member_document_id, str):
-        return set()
-        
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            headers = {
-                'x-api-secret-key': f'{STRAPI_API_TOKEN}',
-                'Content-Type': 'application/json'
-            }
-            
-            url = f"{STRAPI_URL}/api/data-proposals"
-            params = {
-                "filters[member][documentId][$eq]": member_document_id
-            }
-            
-            response = await client.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json().get('data', [])
-                existing_urls = set()
-                
-                for proposal in data:
-                    scraped_items = proposal.get('scrapedData', [])
-
-                    if scraped_items:
-                        for item in scraped_items:
-                            if url_val := item.get('url'):
-                                existing_urls.add(url_val)
-                                
-                return existing_urls
+    async def fetch_proposal_urls_page(self, member_document_id: str, page: int) -> Tuple[List[str], int]:
+        """
+        scrapedData is a JSON attribute, which Strapi cannot project below the whole field.
+        The page is decoded inline: a process hop costs more than json.loads on a page this size.
+        """
+        params = {
+            "filters[member][documentId][$eq]": member_document_id,
+            "fields[0]": "scrapedData",
+            "pagination[page]": page,
+            "pagination[pageSize]": STRAPI_PAGE_SIZE
+        }
+
+        response = await self.request("GET", "/api/data-proposals", params=params)
+        response.raise_for_status()
+
+        return parse_proposal_urls(response.content)
+
+    async def get_existing_urls(self, member_document_id: str) -> set[str]:
+        """
+        URLs already proposed for a member. Only the scrapedData field is requested, the first
+        page reveals the page count and the remaining pages are fetched concurrently.
+        Served from the per-member cache when possible; partial results are never cached.
+        """
+        if not member_document_id or not isinstance(member_document_id, str):
+            return set()
+
+        cached = member_urls.get(member_document_id)
+        if cached is not None:
+            return set(cached)
+
+        existing_urls = set()
+
+        try:
+            urls, page_count = await self.fetch_proposal_urls_page(member_document_id, 1)
+            existing_urls.update(urls)
+
+            semaphore = asyncio.Semaphore(STRAPI_PAGE_CONCURRENCY)
+
+            async def fetch_page(page: int) -> List[str]:
+                async with semaphore:
+                    page_urls, _ = await self.fetch_proposal_urls_page(member_document_id, page)
+                    return page_urls
+
+            for page_urls in await asyncio.gather(*(fetch_page(page) for page in range(2, page_count + 1))):
+                existing_urls.update(page_urls)
+
+            member_urls.put(member_document_id, existing_urls)
+            if self.index:
+                await self.index.reconcile(member_document_id, existing_urls)
+            return set(existing_urls)
+
+        except Exception as e:
+            print(f"Exception fetching existing URLs: {e}")
+            return existing_urls
+
+    async def known_urls(self, member_document_id: str, urls: List[str]) -> set[str]:
+        """
+        The subset of `urls` already proposed for a member. Answered from the local index
+        when the member is warm; otherwise from Strapi, which also warms the index.
+        """
+        if not member_document_id or not isinstance(member_document_id, str):
+            return set()
+
+        if self.index:
+            known = await self.index.lookup(member_document_id, urls)
+            if known is not None:
+                return known
+
+        existing_urls = await self.get_existing_urls(member_document_id)
+        return {url for url in urls if url in existing_urls}
+
+    async def reconcile(self, member_document_id: str) -> bool:
+        """Re-reads a member's proposals from Strapi, replacing its cached and indexed URLs."""
+        member_urls.invalidate(member_document_id)
+        await self.get_existing_urls(member_document_id)
+        # Only a complete read is cached (and indexed)
+        return member_urls.get(member_document_id) is not None
+
+    async def reconcile_many(self, members: List[str]) -> Dict[str, bool]:
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+
+        async def run(member: str) -> bool:
+            async with semaphore:
+                return await self.reconcile(member)
+
+        results = await asyncio.gather(*(run(member) for member in members))
+        return dict(zip(members, results))
+
+    async def reconcile_stale(self, limit: int) -> Dict[str, bool]:
+        """Reconciles up to `limit` members whose index entries are older than the index max age."""
+        if not self.index:
+            return {}
+        return await self.reconcile_many(await self.index.stale_members(limit))
+
+    async def update_member(self, member_document_id: str, data: dict) -> bool:
+        if not member_document_id or not self.token:
+            print("Missing member_document_id or STRAPI_API_TOKEN")
+            return False
+
+        try:
+            path = f"/api/members/{member_document_id}"
+            print(f"Updating member {member_document_id} at {self.base_url}{path} with data: {data}")
+
+            # PUT sets the same fields on every attempt, so it is safe to resend as is
+            response = await self.request("PUT", path, json={"data": data})
+
+            if response.status_code in [200, 201]:
+                print(f"Successfully updated member: {response.json()}")
+                return True
             else:
-                print(f"Error fetching existing URLs: {response.status_code} - {response.text}")
-                return set()
-                
-    except Exception as e:
-        print(f"Exception fetching existing URLs: {e}")
-        return set()
+                print(f"Failed to update member: {response.status_code} - {response.text}")
+                return False
+
+        except Exception as e:
+            print(f"Exception updating member details: {e}")
+            return False
+
+
+_strapi: Optional[StrapiClient] = None
+
+
+def get_strapi() -> StrapiClient:
+    global _strapi
+    if _strapi is None:
+        _strapi = StrapiClient()
+    return _strapi
+
+
+def set_strapi(strapi: Optional[StrapiClient]):
+    global _strapi
+    _strapi = strapi
+
+
+async def send_to_strapi(proposal: dict) -> Optional[dict]:
+    return await get_strapi().create_proposal(proposal)
+
+
+async def get_existing_urls(member_document_id: str) -> set[str]:
+    return await get_strapi().get_existing_urls(member_document_id)
+
+
+async def known_urls(member_document_id: str, urls: List[str]) -> set[str]:
+    return await get_strapi().known_urls(member_document_id, urls)
 
 
 async def update_member_details(member_document_id: str, data: dict) -> bool:
@@ -84,38 +383,4 @@ async def update_member_details(member_document_id: str, data: dict) -> bool:
         data: A dict containing the fields to update (room, phone, email, skosLink).
               skosLink should be a dict matching the component structure.
     """
-    if not member_document_id or not STRAPI_API_TOKEN:
-        print("Missing member_document_id or STRAPI_API_TOKEN")
-        return False
-        
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            headers = {
-                'x-api-secret-key': f'{STRAPI_API_TOKEN}',
-                'Content-Type': 'application/json'
-            }
-            
-            payload = {
-                "data": data
-            }
-            
-            payload = {
-                "data": data
-            }
-            
-            url = f"{STRAPI_URL}/api/members/{member_document_id}"
-            
-            print(f"Updating member {member_document_id} at {url} with data: {data}")
-            
-            response = await client.put(url, json=payload, headers=headers)
-            
-            if response.status_code in [200, 201]:
-                print(f"Successfully updated member: {response.json()}")
-                return True
-            else:
-                print(f"Failed to update member: {response.status_code} - {response.text}")
-                return False
-                
-    except Exception as e:
-        print(f"Exception updating member details: {e}")
-        return False
+    return await get_strapi().update_member(member_document_id, data)
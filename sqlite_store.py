@@ -0,0 +1,54 @@
+from typing import Callable, Optional, Tuple, TypeVar
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+S = TypeVar('S', bound='SQLiteStore')
+
+
+class SQLiteStore:
+    """
+    Base of the local SQLite stores: one WAL-mode connection shared across threads, guarded by
+    `_lock`, with the subclass's `SCHEMA` statements applied on open. Blocking `_method`s take
+    the lock themselves and are called from the event loop through `_run`.
+    """
+
+    SCHEMA: Tuple[str, ...] = ()
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        return await asyncio.to_thread(func, *args)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_store(factory: Callable[[], S], enabled: bool, path: str, description: str) -> Optional[S]:
+    """The store built by `factory`, or None when it is disabled or cannot be opened."""
+    if not enabled:
+        return None
+
+    try:
+        return factory()
+    except sqlite3.Error as e:
+        logger.error(f"Could not open {description} at {path}: {e}")
+        return None
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# config.py reads the environment once at import: keep test runs off data/ and the network exporters
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='isim-test-'))
+os.environ.setdefault('HTTP_CACHE_ENABLED', 'false')
+os.environ.setdefault('TRACING_EXPORTER', 'none')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
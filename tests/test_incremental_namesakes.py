@@ -0,0 +1,68 @@
+"""Incremental dblp and Semantic Scholar scrapes must not fall through to a namesake when nothing is new."""
+import asyncio
+
+import httpx
+
+from http_client import ClientRegistry
+from rate_limit import RateLimiter
+from scrapers.dblp import scrape_dblp
+from scrapers.semantic_scholar import scrape_semantic_scholar
+
+
+def dblp_person(title: str, year: int) -> str:
+    return (
+        f"<dblpperson><r><article><author>Piotr Hajder</author><title>{title}</title>"
+        f"<journal>J</journal><year>{year}</year><ee>https://doi.org/{title}</ee></article></r></dblpperson>"
+    )
+
+
+def dblp_upstream(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    if url.startswith('https://dblp.org/search/author/api'):
+        return httpx.Response(200, json={'result': {'hits': {'hit': [
+            {'info': {'author': 'Piotr Hajder', 'url': 'https://dblp.org/pid/1'}},
+            {'info': {'author': 'Piotr Hajder', 'url': 'https://dblp.org/pid/2'}}
+        ]}}})
+    if url == 'https://dblp.org/pid/1.xml':
+        return httpx.Response(200, text=dblp_person('teacher-paper', 2019))
+    if url == 'https://dblp.org/pid/2.xml':
+        return httpx.Response(200, text=dblp_person('namesake-paper', 2023))
+    return httpx.Response(404)
+
+
+def s2_upstream(request: httpx.Request) -> httpx.Response:
+    url = request.url
+    if url.path == '/graph/v1/author/search':
+        return httpx.Response(200, json={'data': [
+            {'name': 'Piotr Hajder', 'authorId': '1'},
+            {'name': 'Piotr Hajder', 'authorId': '2'}
+        ]})
+    if url.path in ('/graph/v1/author/1/papers', '/graph/v1/author/2/papers'):
+        author_id = url.path.split('/')[-2]
+        year = 2019 if author_id == '1' else 2023
+        papers = [{'paperId': f'p{author_id}', 'title': f'paper-{author_id}', 'year': year, 'authors': [{'name': 'Piotr Hajder'}]}]
+        since = url.params.get('publicationDateOrYear')
+        if since:
+            papers = [paper for paper in papers if paper['year'] >= int(since.rstrip(':'))]
+        return httpx.Response(200, json={'data': papers})
+    return httpx.Response(404)
+
+
+def scrape(scraper, handler, since=None) -> list:
+    async def run():
+        clients = ClientRegistry(rate_limiter=RateLimiter({}, None), transport=httpx.MockTransport(handler))
+        try:
+            return await scraper('Piotr', 'Hajder', 'AGH University of Krakow', 'Computer Science', clients=clients, since=since)
+        finally:
+            await clients.aclose()
+    return asyncio.run(run())
+
+
+def test_dblp_incremental_run_without_new_publications_keeps_top_candidate():
+    assert [item['title'] for item in scrape(scrape_dblp, dblp_upstream)] == ['teacher-paper']
+    assert scrape(scrape_dblp, dblp_upstream, since=2021) == []
+
+
+def test_semantic_scholar_incremental_run_without_new_papers_keeps_top_candidate():
+    assert [item['title'] for item in scrape(scrape_semantic_scholar, s2_upstream)] == ['paper-1']
+    assert scrape(scrape_semantic_scholar, s2_upstream, since=2021) == []
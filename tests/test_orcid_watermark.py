@@ -0,0 +1,104 @@
+"""Incremental ORCID scrapes whose works watermark is unchanged must still resolve the identity."""
+import asyncio
+
+import httpx
+
+from http_client import ClientRegistry
+from models import TeacherRequest
+from rate_limit import RateLimiter
+from scrapers import registry
+from scrapers.orcid import scrape_orcid_info
+from scrapers.registry import latest_orcid_modified, orcid_identity
+from services.aggregation import aggregate_teacher_data
+
+ORCID_ID = '0000-0002-1825-0097'
+WORKS_MODIFIED = 1700000000000
+DBLP_URL = 'https://dblp.org/pid/12/3456'
+
+
+def orcid_record() -> dict:
+    return {
+        'person': {'name': {'given-names': {'value': 'Piotr'}, 'family-name': {'value': 'Hajder'}}},
+        'activities-summary': {
+            'employments': {'affiliation-group': [{'summaries': [
+                {'employment-summary': {'organization': {'name': 'AGH University of Krakow'}}}
+            ]}]},
+            'works': {'last-modified-date': {'value': WORKS_MODIFIED}}
+        }
+    }
+
+
+def upstreams(requested: list) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        requested.append(url)
+        if url.startswith('https://pub.orcid.org/v3.0/search/'):
+            return httpx.Response(200, json={'result': [{'orcid-identifier': {'path': ORCID_ID}}]})
+        if url == f'https://pub.orcid.org/v3.0/{ORCID_ID}':
+            return httpx.Response(200, json=orcid_record())
+        if url == f'https://dblp.org/orcid/{ORCID_ID}':
+            return httpx.Response(303, headers={'Location': DBLP_URL})
+        return httpx.Response(404)
+    return httpx.MockTransport(handler)
+
+
+async def scrape(requested: list, **kwargs) -> list:
+    clients = ClientRegistry(rate_limiter=RateLimiter({}, None), transport=upstreams(requested))
+    try:
+        return await scrape_orcid_info(
+            'Piotr', 'Hajder', 'AGH University of Krakow', 'Computer Science',
+            clients=clients, since={ORCID_ID: WORKS_MODIFIED}, **kwargs
+        )
+    finally:
+        await clients.aclose()
+
+
+def test_unchanged_works_still_resolve_identity():
+    requested = []
+    items = asyncio.run(scrape(requested))
+
+    assert f'https://pub.orcid.org/v3.0/{ORCID_ID}/works' not in requested
+    identity = orcid_identity(items)
+    assert identity is not None
+    assert identity['orcid'] == ORCID_ID
+    assert identity['dois'] == []
+    assert latest_orcid_modified(items, {ORCID_ID: WORKS_MODIFIED}) == {ORCID_ID: WORKS_MODIFIED}
+
+
+def test_unchanged_works_with_known_identity_still_resolve_identity():
+    requested = []
+    items = asyncio.run(scrape(requested, identity={'orcid': ORCID_ID}))
+
+    assert not any('/search/' in url for url in requested)
+    assert orcid_identity(items)['orcid'] == ORCID_ID
+
+
+def test_incremental_aggregation_passes_identity_to_dependents(monkeypatch):
+    monkeypatch.setattr(registry, 'SOURCES', {name: registry.SOURCES[name] for name in ('ORCID', 'dblp')})
+    requested = []
+
+    async def aggregate():
+        clients = ClientRegistry(rate_limiter=RateLimiter({}, None), transport=upstreams(requested))
+        try:
+            return await aggregate_teacher_data(
+                TeacherRequest(
+                    first_name='Piotr',
+                    last_name='Hajder',
+                    member_document_id='member-1',
+                    current_institution='AGH University of Krakow',
+                    field_of_study='Computer Science'
+                ),
+                clients=clients,
+                watermarks={'ORCID': {ORCID_ID: WORKS_MODIFIED}}
+            )
+        finally:
+            await clients.aclose()
+
+    proposal = asyncio.run(aggregate())
+
+    # dblp looked the person up by the ORCID iD instead of waiting it out and searching by name
+    assert f'https://dblp.org/orcid/{ORCID_ID}' in requested
+    assert proposal.sources['ORCID'].items == 0
+    assert not any(item.source == 'ORCID' for item in proposal.scrapedData)
+    assert proposal.identities['orcid']['value'] == ORCID_ID
+    assert 'ORCID' not in proposal.watermarks
@@ -0,0 +1,71 @@
+"""A cached identifier that can no longer be fetched falls back to the name search or directory lookup."""
+import asyncio
+
+import httpx
+
+from http_client import ClientRegistry, set_registry
+from rate_limit import RateLimiter
+from scrapers.orcid import scrape_orcid_info
+from services import skos
+
+STALE_ORCID = '0000-0001-0000-0000'
+ORCID_ID = '0000-0002-1825-0097'
+STALE_PROFILE = 'https://skos.agh.edu.pl/osoba/stale-profile'
+PROFILE = 'https://skos.agh.edu.pl/osoba/piotr-hajder'
+
+
+def orcid_upstream(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    if url.startswith('https://pub.orcid.org/v3.0/search/'):
+        return httpx.Response(200, json={'result': [{'orcid-identifier': {'path': ORCID_ID}}]})
+    if url == f'https://pub.orcid.org/v3.0/{ORCID_ID}':
+        return httpx.Response(200, json={
+            'person': {'name': {'given-names': {'value': 'Piotr'}, 'family-name': {'value': 'Hajder'}}},
+            'activities-summary': {'employments': {'affiliation-group': [{'summaries': [
+                {'employment-summary': {'organization': {'name': 'AGH University of Krakow'}}}
+            ]}]}}
+        })
+    if url == f'https://pub.orcid.org/v3.0/{ORCID_ID}/works':
+        return httpx.Response(200, json={'group': [{'work-summary': [{'title': {'title': {'value': 'Found by search'}}}]}]})
+    return httpx.Response(404)
+
+
+def skos_upstream(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    if url == skos.DEPARTMENT_URL:
+        return httpx.Response(200, text=f'<html><body><a href="{PROFILE}">Hajder Piotr, dr inz.</a></body></html>')
+    if url == PROFILE:
+        return httpx.Response(200, text='<html><body></body></html>')
+    return httpx.Response(404)
+
+
+def run(handler, coro_factory):
+    async def main():
+        clients = ClientRegistry(rate_limiter=RateLimiter({}, None), transport=httpx.MockTransport(handler))
+        set_registry(clients)
+        try:
+            return await coro_factory(clients)
+        finally:
+            set_registry(None)
+            await clients.aclose()
+    return asyncio.run(main())
+
+
+def test_stale_orcid_identity_falls_back_to_search():
+    items = run(orcid_upstream, lambda clients: scrape_orcid_info(
+        'Piotr', 'Hajder', 'AGH University of Krakow', 'Computer Science',
+        clients=clients, identity={'orcid': STALE_ORCID}
+    ))
+
+    assert [item['title'] for item in items] == ['Found by search']
+    assert items[0]['raw_data']['orcid_id'] == ORCID_ID
+
+
+def test_stale_skos_profile_falls_back_to_directory(monkeypatch):
+    monkeypatch.setattr(skos, '_directory', None)
+    monkeypatch.setattr(skos, '_directory_expires_at', 0.0)
+    monkeypatch.setattr(skos, '_directory_lock', asyncio.Lock())
+
+    results = run(skos_upstream, lambda clients: skos.scrape_skos_data('Piotr', 'Hajder', STALE_PROFILE))
+
+    assert [result['url'] for result in results] == [PROFILE]
@@ -0,0 +1,243 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+import httpx
+from config import (
+    TRACING_EXPORTER,
+    TRACING_JSONL_PATH,
+    TRACING_JSONL_MAX_BYTES,
+    TRACING_EXCLUDE_PATHS,
+    TRACING_OTLP_ENDPOINT,
+    TRACING_SERVICE_NAME,
+    TRACING_FLUSH_INTERVAL,
+    TRACING_MAX_QUEUE
+)
+
+logger = logging.getLogger(__name__)
+
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'attributes',
+                 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, name: str, parent: Optional['Span'], kind: int, attributes: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+            'status': 'error' if self.error else 'ok',
+            'error': self.error
+        }
+
+    def to_otlp(self) -> dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        encoded = {'boolValue': value}
+    elif isinstance(value, int):
+        encoded = {'intValue': str(value)}
+    elif isinstance(value, float):
+        encoded = {'doubleValue': value}
+    else:
+        encoded = {'stringValue': str(value)}
+    return {'key': key, 'value': encoded}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+class SpanExporter:
+    """
+    Buffers finished spans and writes them out in batches, either as JSON lines to a file
+    or as OTLP/HTTP JSON to a collector. The buffer is bounded; the oldest spans are dropped.
+    The JSONL file is rotated (one `.1` backup) once it reaches `jsonl_max_bytes`.
+    """
+
+    def __init__(
+        self,
+        kind: str = TRACING_EXPORTER,
+        jsonl_path: str = TRACING_JSONL_PATH,
+        jsonl_max_bytes: int = TRACING_JSONL_MAX_BYTES,
+        otlp_endpoint: str = TRACING_OTLP_ENDPOINT,
+        service_name: str = TRACING_SERVICE_NAME,
+        max_queue: int = TRACING_MAX_QUEUE
+    ):
+        self.kind = kind
+        self.jsonl_path = jsonl_path
+        self.jsonl_max_bytes = jsonl_max_bytes
+        self.otlp_endpoint = otlp_endpoint
+        self.service_name = service_name
+        self._spans: Deque[Span] = deque(maxlen=max_queue)
+        self._client: Optional[httpx.AsyncClient] = None
+
+        if kind == 'jsonl':
+            directory = os.path.dirname(jsonl_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def add(self, span: Span):
+        self._spans.append(span)
+
+    def _write_jsonl(self, spans: List[Span]):
+        try:
+            if self.jsonl_max_bytes and os.path.getsize(self.jsonl_path) >= self.jsonl_max_bytes:
+                os.replace(self.jsonl_path, f"{self.jsonl_path}.1")
+        except FileNotFoundError:
+            pass
+        with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + '\n')
+
+    async def _post_otlp(self, spans: List[Span]):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0)
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': self.service_name},
+                    'spans': [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+        response = await self._client.post(self.otlp_endpoint, json=payload)
+        if response.status_code >= 400:
+            logger.warning(f"OTLP collector rejected {len(spans)} spans: {response.status_code}")
+
+    async def flush(self):
+        if not self._spans:
+            return
+        spans = list(self._spans)
+        self._spans.clear()
+
+        try:
+            if self.kind == 'otlp':
+                await self._post_otlp(spans)
+            else:
+                await asyncio.to_thread(self._write_jsonl, spans)
+        except Exception as e:
+            logger.warning(f"Could not export {len(spans)} spans: {e}")
+
+    async def run(self, interval: float = TRACING_FLUSH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def aclose(self):
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def set_exporter(exporter: Optional[SpanExporter]):
+    global _exporter
+    _exporter = exporter
+
+
+def create_exporter() -> Optional[SpanExporter]:
+    if TRACING_EXPORTER not in ('jsonl', 'otlp'):
+        return None
+    return SpanExporter()
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, **attributes) -> Iterator[Span]:
+    """
+    Opens a span as a child of the current one (or a new trace). Works in async code:
+    the current span lives in a context variable, so tasks started inside inherit it.
+    """
+    current = Span(name, _current_span.get(), kind, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if _exporter is not None:
+            _exporter.add(current)
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per HTTP request and returning its trace ID as X-Trace-Id.
+    Requests to `exclude_paths` (the Prometheus scrape by default) are passed through untraced.
+    """
+
+    def __init__(self, app, exclude_paths=TRACING_EXCLUDE_PATHS):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        with span(f"{scope['method']} {scope['path']}", SERVER, **{
+            'http.method': scope['method'],
+            'http.target': scope['path']
+        }) as server_span:
+            async def send_with_trace(message):
+                if message['type'] == 'http.response.start':
+                    server_span.set_attribute('http.status_code', message['status'])
+                    headers = list(message.get('headers', []))
+                    headers.append((b'x-trace-id', server_span.trace_id.encode()))
+                    message = {**message, 'headers': headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
@@ -1,5 +1,282 @@
-from typing import Optional
-from rapidfuzz import fuzz
+from typing import Dict, List, Optional, Sequence, Tuple
+from functools import lru_cache
+import time
+import numpy as np
+from rapidfuzz import fuzz, process
+from metrics import STAGE_SECONDS
+from tracing import span
+
+
+CS_KEYWORDS = [
+    'computer', 'software', 'algorithm', 'programming', 'code',
+    'computation', 'computational', 'simulation', 'modeling', 'model',
+    'machine learning', 'artificial intelligence', 'ai', 'neural',
+    'database', 'network', 'internet', 'web', 'digital',
+    'embedded', 'microcontroller', 'iot', 'automation',
+    'graphics', 'rendering', '3d', 'visualization', 'image processing',
+    'docker', 'container', 'cloud', 'distributed', 'parallel',
+    'data structure', 'optimization', 'heuristic', 'cellular automata',
+    'finite element', 'numerical', 'mesh', 'solver'
+]
+
+WRONG_FIELD_KEYWORDS = {
+    'civil_engineering': ['gabion', 'tunel', 'most', 'wykop', 'zabudowa', 'bridge', 'tunnel',
+                          'construction', 'concrete', 'steel structure', 'foundation'],
+    'medicine': ['patient', 'clinical', 'disease', 'therapy', 'diagnosis',
+                'hospital', 'medical', 'health', 'drug', 'pharmaceutical'],
+    'pure_biology': ['gene', 'protein', 'dna', 'molecular biology', 'cell culture',
+                    'organism', 'species', 'evolution', 'ecological'],
+    'chemistry': ['synthesis', 'molecule', 'chemical reaction', 'compound',
+                 'titration', 'spectroscopy', 'organic chemistry']
+}
+
+SCORE_CACHE_SIZE = 4096
+
+# Below this many items score_batch scores one by one: the array set-up costs more than it saves
+SCORE_BATCH_MIN_ITEMS = 64
+
+
+class KeywordMatcher:
+    """
+    All keyword groups merged into one table of unique keywords, so a text is scanned
+    once per keyword no matter how many groups share it. Substring semantics are the same
+    as `keyword in text`, which in CPython is faster than a regex or trie automaton here.
+    """
+
+    def __init__(self, groups: Dict[str, list]):
+        self.groups = list(groups)
+        memberships: Dict[str, list] = {}
+        for group, keywords in groups.items():
+            for keyword in dict.fromkeys(keywords):
+                memberships.setdefault(keyword, []).append(group)
+        self.table: Tuple[Tuple[str, tuple], ...] = tuple(
+            (keyword, tuple(groups_)) for keyword, groups_ in memberships.items()
+        )
+        self.indexed_table: Tuple[Tuple[str, Tuple[int, ...]], ...] = tuple(
+            (keyword, tuple(self.groups.index(group) for group in groups_)) for keyword, groups_ in self.table
+        )
+
+    def count(self, text: str) -> Dict[str, int]:
+        counts = dict.fromkeys(self.groups, 0)
+        for keyword, groups in self.table:
+            if keyword in text:
+                for group in groups:
+                    counts[group] += 1
+        return counts
+
+    def count_batch(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Per-group hit counts for many texts, as arrays aligned with `texts`. The substring scan
+        stays a plain loop (the same one count() runs); only the result is built as one array.
+        """
+        rows = []
+        for text in texts:
+            row = [0] * len(self.groups)
+            for keyword, indices in self.indexed_table:
+                if keyword in text:
+                    for g in indices:
+                        row[g] += 1
+            rows.append(row)
+        counts = np.array(rows, dtype=np.int64).reshape(len(texts), len(self.groups))
+        return {group: counts[:, g] for g, group in enumerate(self.groups)}
+
+
+FIELD_MATCHER = KeywordMatcher({'cs': CS_KEYWORDS, **WRONG_FIELD_KEYWORDS})
+
+
+class ConfidenceScorer:
+    """
+    calculate_confidence_score compiled for one target: the name variants, institution
+    and field flags are prepared once, and name similarities for repeated author strings
+    are memoized (full scores are not: whole abstracts rarely repeat).
+    """
+
+    def __init__(
+        self,
+        target_name: str,
+        target_institution: Optional[str] = None,
+        field_of_study: Optional[str] = None
+    ):
+        self.target_name = target_name
+        self.target_lower = target_name.lower()
+        target_parts = self.target_lower.split()
+        self.last_name = target_parts[-1] if target_parts else ""
+        self.first_name = target_parts[0] if len(target_parts) > 0 else ""
+        self.first_initial = self.first_name[0] if self.first_name else ""
+
+        self.target_institution = target_institution
+        self.institution_lower = target_institution.lower() if target_institution else None
+
+        self.field_of_study = field_of_study
+        field_lower = field_of_study.lower() if field_of_study else ""
+        self.cs_field = 'computer' in field_lower or 'software' in field_lower or 'modeling' in field_lower
+
+        self.name_score = lru_cache(maxsize=SCORE_CACHE_SIZE)(self._name_score)
+
+    def _name_score(self, scraped_name: str) -> float:
+        scraped_lower = scraped_name.lower()
+        ratio = fuzz.ratio(scraped_lower, self.target_lower) / 100.0
+        name_score = ratio
+
+        if '.' in scraped_lower:
+            if self.last_name and self.last_name in scraped_lower:
+                if self.first_initial and self.first_initial in scraped_lower:
+                    name_score = 0.6
+                else:
+                    name_score = 0.4
+            else:
+                name_score = 0.2
+
+        if self.first_name in scraped_lower and self.last_name in scraped_lower:
+            name_score = max(name_score, ratio)
+
+        return name_score
+
+    def score(
+        self,
+        scraped_name: str,
+        scraped_institution: Optional[str] = None,
+        scraped_text: Optional[str] = None
+    ) -> float:
+        name_contribution = self.name_score(scraped_name) * 0.4
+
+        institution_contribution = 0.0
+        if scraped_institution and self.institution_lower:
+            institution_score = fuzz.partial_ratio(
+                scraped_institution.lower(),
+                self.institution_lower
+            ) / 100.0
+            institution_contribution = institution_score * 0.2
+
+        field_contribution = 0.0
+        field_penalty = 0.0
+
+        if scraped_text and self.field_of_study:
+            counts = FIELD_MATCHER.count(scraped_text.lower())
+
+            for wrong_field in WRONG_FIELD_KEYWORDS:
+                wrong_matches = counts[wrong_field]
+                if wrong_matches >= 2:
+                    field_penalty = 0.6
+                    break
+                elif wrong_matches == 1:
+                    field_penalty = max(field_penalty, 0.3)
+
+            if self.cs_field:
+                cs_matches = counts['cs']
+
+                if cs_matches >= 3:
+                    field_contribution = 0.4
+                elif cs_matches >= 2:
+                    field_contribution = 0.3
+                elif cs_matches >= 1:
+                    field_contribution = 0.2
+                else:
+                    if field_penalty == 0:
+                        field_penalty = 0.2
+
+        total_score = name_contribution + institution_contribution + field_contribution - field_penalty
+
+        total_score = max(0.0, min(total_score, 1.0))
+
+        return round(total_score, 2)
+
+    def score_batch(self, items: Sequence[Tuple[str, Optional[str], Optional[str]]]) -> np.ndarray:
+        """
+        Scores many (authors, institution, text) tuples against this target at once.
+        From SCORE_BATCH_MIN_ITEMS up, name and institution similarities come from one
+        single-threaded process.cdist call each and the field part from a batched keyword count;
+        smaller batches go through score(). Results equal score() item by item either way.
+        """
+        if not items:
+            return np.zeros(0, dtype=np.float64)
+        if len(items) < SCORE_BATCH_MIN_ITEMS:
+            return np.array([self.score(*item) for item in items], dtype=np.float64)
+
+        started = time.perf_counter()
+        with span('score_batch', items=len(items)):
+            names = [name.lower() for name, _, _ in items]
+            ratios = process.cdist(
+                names,
+                [self.target_lower],
+                scorer=fuzz.ratio,
+                dtype=np.float64,
+                workers=1
+            )[:, 0] / 100.0
+
+            name_scores = ratios.copy()
+            for i, scraped_lower in enumerate(names):
+                if '.' in scraped_lower:
+                    if self.last_name and self.last_name in scraped_lower:
+                        if self.first_initial and self.first_initial in scraped_lower:
+                            name_scores[i] = 0.6
+                        else:
+                            name_scores[i] = 0.4
+                    else:
+                        name_scores[i] = 0.2
+
+                if self.first_name in scraped_lower and self.last_name in scraped_lower:
+                    name_scores[i] = max(name_scores[i], ratios[i])
+
+            name_contribution = name_scores * 0.4
+
+            institution_contribution = np.zeros(len(items), dtype=np.float64)
+            if self.institution_lower:
+                with_institution = [i for i, (_, inst, _) in enumerate(items) if inst]
+                if with_institution:
+                    partial = process.cdist(
+                        [items[i][1].lower() for i in with_institution],
+                        [self.institution_lower],
+                        scorer=fuzz.partial_ratio,
+                        dtype=np.float64,
+                        workers=1
+                    )[:, 0] / 100.0
+                    institution_contribution[with_institution] = partial * 0.2
+
+            field_contribution = np.zeros(len(items), dtype=np.float64)
+            field_penalty = np.zeros(len(items), dtype=np.float64)
+
+            if self.field_of_study:
+                with_text = [i for i, (_, _, text) in enumerate(items) if text]
+                if with_text:
+                    counts = FIELD_MATCHER.count_batch([items[i][2].lower() for i in with_text])
+
+                    wrong = np.stack([counts[group] for group in WRONG_FIELD_KEYWORDS])
+                    penalty = np.where(
+                        (wrong >= 2).any(axis=0), 0.6,
+                        np.where((wrong == 1).any(axis=0), 0.3, 0.0)
+                    )
+
+                    contribution = np.zeros(len(with_text), dtype=np.float64)
+                    if self.cs_field:
+                        cs_matches = counts['cs']
+                        contribution = np.select(
+                            [cs_matches >= 3, cs_matches >= 2, cs_matches >= 1],
+                            [0.4, 0.3, 0.2],
+                            default=0.0
+                        )
+                        penalty = np.where((cs_matches == 0) & (penalty == 0), 0.2, penalty)
+
+                    field_contribution[with_text] = contribution
+                    field_penalty[with_text] = penalty
+
+            total_score = name_contribution + institution_contribution + field_contribution - field_penalty
+
+            total_score = np.clip(total_score, 0.0, 1.0)
+            scores = np.array([round(float(score), 2) for score in total_score], dtype=np.float64)
+
+        STAGE_SECONDS.labels('score_batch').observe(time.perf_counter() - started)
+        return scores
+
+
+@lru_cache(maxsize=256)
+def get_scorer(
+    target_name: str,
+    target_institution: Optional[str] = None,
+    field_of_study: Optional[str] = None
+) -> ConfidenceScorer:
+    """Returns the shared scorer for a target, so every scraper of one teacher reuses the same memo."""
+    return ConfidenceScorer(target_name, target_institution, field_of_study)
 
 
 def calculate_confidence_score(
@@ -13,95 +290,8 @@ def calculate_confidence_score(
     """
     Calculate confidence score with better field matching and name variations
     """
-    
-    target_parts = target_name.lower().split()
-    scraped_lower = scraped_name.lower()
-    
-    last_name = target_parts[-1] if target_parts else ""
-    first_name = target_parts[0] if len(target_parts) > 0 else ""
-    
-    name_score = fuzz.ratio(scraped_lower, target_name.lower()) / 100.0
-    
-    if '.' in scraped_lower:
-        if last_name and last_name in scraped_lower:
-            first_initial = first_name[0] if first_name else ""
-            if first_initial and first_initial in scraped_lower:
-                name_score = 0.6
-            else:
-                name_score = 0.4
-        else:
-            name_score = 0.2
-
-    if first_name in scraped_lower and last_name in scraped_lower:
-        full_match_score = fuzz.ratio(scraped_lower, target_name.lower()) / 100.0
-        name_score = max(name_score, full_match_score)
-    
-    name_contribution = name_score * 0.4
-    
-    
-    institution_contribution = 0.0
-    if scraped_institution and target_institution:
-        institution_score = fuzz.partial_ratio(
-            scraped_institution.lower(),
-            target_institution.lower()
-        ) / 100.0
-        institution_contribution = institution_score * 0.2
-    
-    
-    field_contribution = 0.0
-    field_penalty = 0.0
-    
-    if scraped_text and field_of_study:
-        text_lower = scraped_text.lower()
-        field_lower = field_of_study.lower()
-        
-        cs_keywords = [
-            'computer', 'software', 'algorithm', 'programming', 'code',
-            'computation', 'computational', 'simulation', 'modeling', 'model',
-            'machine learning', 'artificial intelligence', 'ai', 'neural',
-            'database', 'network', 'internet', 'web', 'digital',
-            'embedded', 'microcontroller', 'iot', 'automation',
-            'graphics', 'rendering', '3d', 'visualization', 'image processing',
-            'docker', 'container', 'cloud', 'distributed', 'parallel',
-            'data structure', 'optimization', 'heuristic', 'cellular automata',
-            'finite element', 'numerical', 'mesh', 'solver'
-        ]
-        
-        wrong_field_keywords = {
-            'civil_engineering': ['gabion', 'tunel', 'most', 'wykop', 'zabudowa', 'bridge', 'tunnel', 
-                                  'construction', 'concrete', 'steel structure', 'foundation'],
-            'medicine': ['patient', 'clinical', 'disease', 'therapy', 'diagnosis', 
-                        'hospital', 'medical', 'health', 'drug', 'pharmaceutical'],
-            'pure_biology': ['gene', 'protein', 'dna', 'molecular biology', 'cell culture',
-                            'organism', 'species', 'evolution', 'ecological'],
-            'chemistry': ['synthesis', 'molecule', 'chemical reaction', 'compound',
-                         'titration', 'spectroscopy', 'organic chemistry']
-        }
-        
-        for wrong_field, keywords in wrong_field_keywords.items():
-            wrong_matches = sum(1 for kw in keywords if kw in text_lower)
-            if wrong_matches >= 2:
-                field_penalty = 0.6
-                break
-            elif wrong_matches == 1:
-                field_penalty = max(field_penalty, 0.3)
-        
-        if 'computer' in field_lower or 'software' in field_lower or 'modeling' in field_lower:
-            cs_matches = sum(1 for kw in cs_keywords if kw in text_lower)
-            
-            if cs_matches >= 3:
-                field_contribution = 0.4
-            elif cs_matches >= 2:
-                field_contribution = 0.3
-            elif cs_matches >= 1:
-                field_contribution = 0.2
-            else:
-                if field_penalty == 0:
-                    field_penalty = 0.2
-    
-    
-    total_score = name_contribution + institution_contribution + field_contribution - field_penalty
-    
-    total_score = max(0.0, min(total_score, 1.0))
-    
-    return round(total_score, 2)
\ No newline at end of file
+    return get_scorer(target_name, target_institution, field_of_study).score(
+        scraped_name,
+        scraped_institution,
+        scraped_text
+    )
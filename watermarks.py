@@ -0,0 +1,64 @@
+from typing import Any, Dict, Optional
+import json
+import time
+from config import WATERMARKS_ENABLED, WATERMARKS_PATH
+from sqlite_store import SQLiteStore, open_store
+
+
+class WatermarkStore(SQLiteStore):
+    """
+    Per-member, per-source high-water marks of what has already been scraped and proposed
+    (newest year, arXiv submission date, ORCID works modification time, ...).
+    Values are whatever the source's watermark function produces, stored as JSON.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS watermarks (
+            member TEXT NOT NULL,
+            source TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (member, source)
+        )
+        """,
+    )
+
+    def _get_all(self, member: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, value FROM watermarks WHERE member = ?",
+                (member,)
+            ).fetchall()
+        return {source: json.loads(value) for source, value in rows}
+
+    def _update(self, member: str, watermarks: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)",
+                [(member, source, json.dumps(value), now) for source, value in watermarks.items()]
+            )
+            self._conn.commit()
+
+    def _clear(self, member: str, source: Optional[str] = None):
+        with self._lock:
+            if source is None:
+                self._conn.execute("DELETE FROM watermarks WHERE member = ?", (member,))
+            else:
+                self._conn.execute("DELETE FROM watermarks WHERE member = ? AND source = ?", (member, source))
+            self._conn.commit()
+
+    async def get_all(self, member: str) -> Dict[str, Any]:
+        return await self._run(self._get_all, member)
+
+    async def update(self, member: str, watermarks: Dict[str, Any]):
+        if watermarks:
+            await self._run(self._update, member, watermarks)
+
+    async def clear(self, member: str, source: Optional[str] = None):
+        await self._run(self._clear, member, source)
+
+
+def create_watermark_store() -> Optional[WatermarkStore]:
+    return open_store(lambda: WatermarkStore(WATERMARKS_PATH), WATERMARKS_ENABLED, WATERMARKS_PATH, "watermark store")